@@ -1,97 +1,172 @@
 # -----------------2 order_agent (LLM-powered agent) -----------------
 
+import os
+import asyncio
 from langchain_core.messages import AIMessage
-from langchain_groq import ChatGroq
-from backend.db import get_connection
+from backend.db import db_connection
+from backend.catalog import resolve_product
+from backend.llm import LLMUnavailable, ainvoke_llm
+from backend.agents.order_parser import parse_order_json, parse_order_items
 from backend.graph.state import ConversationState, get_last_human_message
 from dotenv import load_dotenv
 import uuid
 
 load_dotenv()
 
-# -----------------------------
-# Database connection
-# -----------------------------
-conn = get_connection()
-cursor = conn.cursor()
-
-# -----------------------------
-# LLM for agent reasoning
-# -----------------------------
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0
-)
+# 1 = only catalog products can be ordered; 0 = unmatched text is kept
+# as product_name with product_id NULL (empty / partial catalog)
+ORDER_REQUIRE_CATALOG_MATCH = os.getenv("ORDER_REQUIRE_CATALOG_MATCH", "0") == "1"
+ORDER_MAX_ITEMS = int(os.getenv("ORDER_MAX_ITEMS", "20"))
 
 # =====================================================================
 # TOOL: Create order
 # =====================================================================
-def create_order(user_id: str, product: str, quantity: int):
+def resolve_order_items(items):
+    """
+    Resolve each {"product", "quantity"} item against the catalog.
+    Returns (lines, ambiguous, unmatched):
+    - lines: (product_id, product_name, quantity)
+    - ambiguous: (product text, candidate names) to ask the user about
+    - unmatched: product texts with no catalog product at all when
+      ORDER_REQUIRE_CATALOG_MATCH is set
+    """
+    lines, ambiguous, unmatched = [], [], []
+    for item in items:
+        result = resolve_product(item["product"])
+        match = result["match"]
+        if match is None and result["candidates"]:
+            ambiguous.append((item["product"], [c["name"] for c in result["candidates"]]))
+            continue
+        if match is None and ORDER_REQUIRE_CATALOG_MATCH:
+            unmatched.append(item["product"])
+            continue
+        lines.append((
+            match["product_id"] if match else None,
+            match["name"] if match else item["product"],
+            item["quantity"],
+        ))
+    return lines, ambiguous, unmatched
+
+
+def create_order(user_id: str, lines) -> str:
+    """
+    Insert the order header + all line items in ONE transaction
+    (one commit, one order ID). The header keeps product_name /
+    quantity as a summary for track / return / ticket flows.
+    """
     order_id = f"ORD-{uuid.uuid4().hex[:6].upper()}"
 
-    cursor.execute(
-        """
-        INSERT INTO orders (order_id, user_id, product_name, quantity, status)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (order_id, user_id, product, quantity, "PLACED")
-    )
-    conn.commit()
+    if len(lines) == 1:
+        product_id, product_name, quantity = lines[0]
+    else:
+        product_id = None
+        product_name = ", ".join(f"{qty} x {name}" for _, name, qty in lines)
+        quantity = sum(qty for _, _, qty in lines)
+
+    with db_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO orders (order_id, user_id, product_id, product_name, quantity, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (order_id, user_id, product_id, product_name, quantity, "PLACED")
+        )
+        conn.executemany(
+            """
+            INSERT INTO order_items (order_id, line_no, product_id, product_name, quantity)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (order_id, line_no, item_id, name, qty)
+                for line_no, (item_id, name, qty) in enumerate(lines, start=1)
+            ]
+        )
 
     return order_id
 
 
 # =====================================================================
-# AGENT: Order Agent
+# LLM extraction (messages the local parser can't handle)
 # =====================================================================
-def order_agent(state: ConversationState) -> ConversationState:
-    """
-    LLM-powered Order Agent.
-    """
-
-    user_text = get_last_human_message(state["messages"])
-    user_id = state["user_id"]
-
-    # -------------------------------------------------
-    # STEP 1: Agent reasoning — extract entities
-    # -------------------------------------------------
+async def extract_order_with_llm(user_text: str) -> list:
     prompt = f"""
 You are an order assistant for an e-commerce platform.
 
 User message:
 "{user_text}"
 
-Extract:
+Extract every product the user wants to order, each with:
 - product name
 - quantity (default to 1 if not mentioned)
 
-If product is missing, set product to null.
+If no product is mentioned, return an empty items list.
 
 Respond ONLY in JSON:
 {{
-  "product": null or "<product name>",
-  "quantity": <number>
+  "items": [
+    {{"product": "<product name>", "quantity": <number>}}
+  ]
 }}
 """
     try:
-        response = llm.invoke(prompt).content.strip()
-        data = eval(response)
-    except Exception:
-        data = {"product": None, "quantity": 1}
+        return parse_order_json(await ainvoke_llm(prompt, agent="order_agent", json_mode=True))
+    except (LLMUnavailable, ValueError):
+        return []
 
-    product = data.get("product")
-    quantity = data.get("quantity", 1)
+
+def is_valid_product(product) -> bool:
+    return (
+        isinstance(product, str)
+        and product.strip() != ""
+        and product.lower() != "missing_product"
+        and len(product.strip()) >= 3
+    )
+
+
+# =====================================================================
+# AGENT: Order Agent
+# =====================================================================
+async def order_agent(state: ConversationState) -> ConversationState:
+    """
+    LLM-powered Order Agent.
+    """
+
+    user_text = get_last_human_message(state["messages"])
+    user_id = state["user_id"]
 
     # -------------------------------------------------
-    # STEP 2: Validate product (FIXED LOGIC)
+    # STEP 1: Agent reasoning — extract line items
+    # simple "Order 2 headphones and 3 phone cases" shapes are parsed
+    # locally; only the rest goes to the LLM (JSON mode, strictly parsed)
     # -------------------------------------------------
-    if (
-        not product
-        or not isinstance(product, str)
-        or product.strip() == ""
-        or product.lower() == "missing_product"
-        or len(product.strip()) < 3
-    ):
+    items = parse_order_items(user_text)
+    if items is None:
+        items = await extract_order_with_llm(user_text)
+
+    # -------------------------------------------------
+    # STEP 2: Validate products
+    # -------------------------------------------------
+    # one bad line means the cart isn't what was asked for: place nothing
+    invalid = [item.get("product") for item in items if not is_valid_product(item.get("product"))]
+    unclear = [
+        product.strip() for product in invalid
+        if isinstance(product, str) and product.strip() and product.lower() != "missing_product"
+    ]
+
+    if unclear:
+        names = ", ".join(f"**{product}**" for product in unclear)
+        state["messages"].append(
+            AIMessage(
+                content=(
+                    f"🤔 I couldn't tell which product {names} is, so nothing was ordered yet.\n\n"
+                    "Please send the whole order again with full product names.\n\n"
+                    "Example: *Order 2 wireless headphones*"
+                )
+            )
+        )
+        return state
+
+    if not items or invalid:
         state["messages"].append(
             AIMessage(
                 content=(
@@ -102,21 +177,73 @@ Respond ONLY in JSON:
         )
         return state
 
+    if len(items) > ORDER_MAX_ITEMS:
+        state["messages"].append(
+            AIMessage(
+                content=(
+                    f"😕 An order can have at most {ORDER_MAX_ITEMS} products.\n\n"
+                    "Please split it into smaller orders."
+                )
+            )
+        )
+        return state
+
     # -------------------------------------------------
-    # STEP 3: Place order
+    # STEP 3: Place order (header + line items, one transaction)
     # -------------------------------------------------
-    order_id = create_order(user_id, product, quantity)
+    lines, ambiguous, unmatched = await asyncio.to_thread(resolve_order_items, items)
+
+    # several / only partial catalog matches: let the user pick
+    if ambiguous:
+        choices = "\n\n".join(
+            f"🤔 Which **{product}** did you mean?\n" + "".join(f"• {name}\n" for name in names)
+            for product, names in ambiguous
+        )
+        state["messages"].append(
+            AIMessage(
+                content=(
+                    f"{choices}\n"
+                    f"Please order using the full product name.\n\n"
+                    f"Example: *Order 1 {ambiguous[0][1][0]}*"
+                )
+            )
+        )
+        return state
+
+    if unmatched:
+        missing = ", ".join(f"**{product}**" for product in unmatched)
+        state["messages"].append(
+            AIMessage(
+                content=(
+                    f"😕 I couldn't find {missing} in our catalog.\n\n"
+                    "Please check the product name and try again."
+                )
+            )
+        )
+        return state
+
+    order_id = await asyncio.to_thread(create_order, user_id, lines)
 
     # -------------------------------------------------
     # STEP 4: Respond
     # -------------------------------------------------
+    if len(lines) == 1:
+        _, product_name, quantity = lines[0]
+        details = (
+            f"📦 Product: {product_name}\n"
+            f"🔢 Quantity: {quantity}\n\n"
+        )
+    else:
+        details = "📦 Products:\n" + "".join(
+            f"• {name} × {qty}\n" for _, name, qty in lines
+        ) + "\n"
+
     state["messages"].append(
         AIMessage(
             content=(
                 "🎉 **YOUR ORDER PLACED SUCCESSFULLY** 🎉\n\n"
                 f"🆔 Order ID: {order_id}\n"
-                f"📦 Product: {product}\n"
-                f"🔢 Quantity: {quantity}\n\n"
+                f"{details}"
                 "You can track or return this order anytime."
             )
         )
@@ -0,0 +1,188 @@
+import re
+import json
+from typing import Optional
+
+# ----------------------------------
+# Order message grammar (fast path, no LLM)
+# ----------------------------------
+#   [I want to | I'd like to | please ...] <verb> [of|for] <item> [, | and <item>]... [to my cart]
+#   [I want to | please ...] add <item> [, | and <item>]... to [my] cart
+#   <item> = [N | a/an] [units] <product>
+#
+# parse_order_items() returns None for anything outside this shape
+# (questions, order IDs, long free text) so only those messages go to
+# the LLM.
+_PREFIX = (
+    r"(?:(?:i\s+)?(?:wanna|(?:want|would\s+like|need)\s+to)\s+|i'?d\s+like\s+to\s+"
+    r"|can\s+i\s+|could\s+you\s+|please\s+|kindly\s+|hi\s*,?\s+)*"
+)
+# no generic "get" / bare "add": "get me a refund", "add a note" aren't orders
+_VERB = (
+    r"(?:place\s+(?:an?\s+)?(?:new\s+)?order(?:\s+(?:of|for))?|order|buy|purchase)"
+)
+_ORDER_MESSAGE = re.compile(rf"^{_PREFIX}{_VERB}(?:\s+(?P<rest>.*))?$", re.IGNORECASE)
+_ADD_TO_CART = re.compile(
+    rf"^{_PREFIX}add(?:\s+(?P<rest>.*?))?\s+(?:to|in)\s+(?:(?:my|the)\s+)?cart$", re.IGNORECASE
+)
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+_NUMBER = r"(?:\d+|" + "|".join(_NUMBER_WORDS) + r")"
+_QUANTITY = re.compile(
+    rf"^(?P<n>{_NUMBER})(?:\s*x)?\s+"
+    r"(?:pcs?\s+(?:of\s+)?|pieces?\s+(?:of\s+)?|units?\s+(?:of\s+)?|nos?\.?\s+)?",
+    re.IGNORECASE,
+)
+# list separator, only where the next item starts with a quantity:
+# "2 headphones, 3 phone cases and a charger" splits,
+# "a laptop bag, the black one" / "salt and pepper" don't
+_ITEM_SEPARATOR = re.compile(
+    rf"\s*(?:,|;|&|\band\b|\bplus\b)\s*(?:and\s+)?(?={_NUMBER}(?:\s*x)?\s)",
+    re.IGNORECASE,
+)
+_LEAD = re.compile(r"^(?:of|for|me)\s+", re.IGNORECASE)
+_ARTICLE = re.compile(r"^(?:the|some|my)\s+", re.IGNORECASE)
+# also a whole "product" on its own: "order now", "add to cart"
+_TRAILER = re.compile(
+    r"(?:^|\s+)(?:(?:to|in)\s+(?:(?:my|the)\s+)?cart|for\s+me|please|now|today|asap"
+    r"|right\s+away|online)$",
+    re.IGNORECASE,
+)
+
+# needs the LLM: unsplit lists, order IDs / order talk, questions
+_NOT_SIMPLE = re.compile(r"(?:\band\b|&|,|;|\?|\bORD-|\border)", re.IGNORECASE)
+MAX_PRODUCT_WORDS = 6
+# "a few / a couple of ...": no usable quantity
+_FUZZY_QUANTITY = re.compile(r"^(?:few|couple|dozen|pair|lot|bunch|bit)\b", re.IGNORECASE)
+# support requests, not products: "order status", "buy a refund"
+_NOT_PRODUCT = re.compile(
+    r"^(?:refunds?|status|history|details?|updates?|tracking|cancel\w*|help|support"
+    r"|invoices?|receipts?|returns?|replacements?|exchanges?|delivery)\b",
+    re.IGNORECASE,
+)
+# larger quantities are a typo or abuse; never stored
+MAX_ITEM_QUANTITY = 1000
+
+# leftovers that are not a product: "order two", "order 3 of them",
+# "order 5 pcs", "order some", "Order my"
+_NOT_A_NAME = re.compile(
+    rf"^(?:{_NUMBER}|pcs?|pieces?|units?|nos?\.?|of\b.*"
+    r"|the|some|my|your|our|his|her|their)$",
+    re.IGNORECASE,
+)
+
+# "Order something", "Buy it": a recognized order with no product
+_VAGUE_PRODUCTS = {
+    "", "it", "this", "that", "them", "these", "those", "something", "anything",
+    "stuff", "things", "item", "items", "product", "products", "one",
+}
+
+
+def _parse_item(fragment: str) -> Optional[dict]:
+    """
+    "2 wireless headphones" -> {"product": "wireless headphones", "quantity": 2};
+    product None if vague, None if the fragment needs the LLM.
+    """
+    quantity = 1
+    quantity_match = _QUANTITY.match(fragment)
+    if quantity_match:
+        n = quantity_match.group("n").lower()
+        quantity = int(n) if n.isdigit() else _NUMBER_WORDS[n]
+        fragment = fragment[quantity_match.end():]
+
+    if not 1 <= quantity <= MAX_ITEM_QUANTITY:
+        return None
+
+    product = _ARTICLE.sub("", fragment).strip()
+    while _TRAILER.search(product):
+        product = _TRAILER.sub("", product).strip()
+
+    if product.lower() in _VAGUE_PRODUCTS:
+        return {"product": None, "quantity": quantity}
+    if (
+        _NOT_A_NAME.match(product)
+        or _NOT_SIMPLE.search(product)
+        or _FUZZY_QUANTITY.match(product)
+        or _NOT_PRODUCT.match(product)
+        or len(product.split()) > MAX_PRODUCT_WORDS
+    ):
+        return None
+    return {"product": product, "quantity": quantity}
+
+
+def parse_order_items(text: str) -> Optional[list]:
+    """
+    [{"product": str, "quantity": int}, ...] for a simple order message,
+    [] for an order with no product ("Place an order"),
+    None if the message needs the LLM.
+    """
+    text = " ".join(text.split()).rstrip(".!?")
+    match = _ORDER_MESSAGE.match(text) or _ADD_TO_CART.match(text)
+    if not match:
+        return None
+
+    rest = _LEAD.sub("", match.group("rest") or "")
+
+    items = []
+    for fragment in _ITEM_SEPARATOR.split(rest):
+        item = _parse_item(fragment)
+        if item is None:
+            return None
+        items.append(item)
+
+    if any(item["product"] is None for item in items):
+        # "Order it" is a product-less order; "2 pens and 3 of those" isn't simple
+        return [] if len(items) == 1 else None
+    return items
+
+
+# ----------------------------------
+# Strict JSON parsing of the LLM reply
+# ----------------------------------
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def _json_item(data) -> dict:
+    if not isinstance(data, dict):
+        raise ValueError(f"invalid item: {data!r}")
+
+    product = data.get("product")
+    if product is not None and not isinstance(product, str):
+        raise ValueError(f"invalid product: {product!r}")
+
+    quantity = data.get("quantity", 1)
+    if isinstance(quantity, str) and quantity.strip().isdigit():
+        quantity = int(quantity)
+    if quantity is None:
+        quantity = 1
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or not 1 <= quantity <= MAX_ITEM_QUANTITY:
+        raise ValueError(f"invalid quantity: {quantity!r}")
+
+    product = product.strip() if product else None
+    return {"product": product or None, "quantity": quantity}
+
+
+def parse_order_json(reply: str) -> list:
+    """
+    Parse + validate {"items": [{"product": str | null, "quantity": int}, ...]}
+    (a bare {"product", "quantity"} object is read as one item).
+    Returns the items that name a product; raises ValueError on anything
+    else (never eval()s model output).
+    """
+    reply = _FENCE.sub("", reply.strip())
+    start, end = reply.find("{"), reply.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("no JSON object in reply")
+
+    data = json.loads(reply[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("reply is not a JSON object")
+
+    items = data["items"] if "items" in data else [data]
+    if not isinstance(items, list):
+        raise ValueError(f"invalid items: {items!r}")
+
+    items = [_json_item(item) for item in items]
+    return [item for item in items if item["product"]]
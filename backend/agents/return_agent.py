@@ -1,62 +1,43 @@
+import asyncio
 from langchain_core.messages import AIMessage
-from langchain_groq import ChatGroq
-from backend.db import get_connection
-from backend.graph.state import ConversationState, get_last_human_message
+from backend.db import HOT_QUERIES, db_connection
+from backend.llm import LLMUnavailable, ainvoke_llm
+from backend import offline
+from backend.graph.state import ConversationState, get_last_human_message, get_prefetched_order
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# -----------------------------
-# Database connection (unchanged)
-# -----------------------------
-conn = get_connection()
-cursor = conn.cursor()
-
-# -----------------------------
-# LLM for agent reasoning
-# -----------------------------
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0
-)
-
 # =====================================================================
 # TOOL 1: Validate order belongs to user
 # =====================================================================
 def validate_order(order_id: str, user_id: str):
-    cursor.execute(
-        "SELECT id, status FROM orders WHERE order_id=? AND user_id=?",  # 🔴 NEW: fetch status also
-        (order_id, user_id)
-    )
-    return cursor.fetchone()
+    sql, _ = HOT_QUERIES["validate_order"]
+    with db_connection() as conn:
+        return conn.execute(sql, (order_id, user_id)).fetchone()
 
 # =====================================================================
 # TOOL 2 (Database tool): Create return request 
 # =====================================================================
 def create_return_request(user_id: str, order_id: str, reason: str):
-    cursor.execute(
-        """
-        UPDATE orders
-        SET status = ?, return_reason = ?
-        WHERE order_id = ?
-        """,
-        ("RETURN_REQUESTED", reason, order_id)
-    )
-
-    cursor.execute(
-        """
-        INSERT INTO returns (user_id, order_id, reason, status)
-        VALUES (?, ?, ?, ?)
-        """,
-        (user_id, order_id, reason, "RETURN_REQUESTED")
-    )
-    conn.commit()
+    # both writes commit (or roll back) together
+    update_sql, _ = HOT_QUERIES["update_return_status"]
+    with db_connection() as conn:
+        conn.execute(update_sql, ("RETURN_REQUESTED", reason, order_id))
+
+        conn.execute(
+            """
+            INSERT INTO returns (user_id, order_id, reason, status)
+            VALUES (?, ?, ?, ?)
+            """,
+            (user_id, order_id, reason, "RETURN_REQUESTED")
+        )
 
 
 # =====================================================================
 # AGENT: Return Agent with reasoning + tools
 # =====================================================================
-def return_agent(state: ConversationState) -> ConversationState:
+async def return_agent(state: ConversationState) -> ConversationState:
     """
     LLM-powered Return Agent.
     - Uses LLM to extract return reason
@@ -83,31 +64,14 @@ def return_agent(state: ConversationState) -> ConversationState:
         return state
 
     # -------------------------------------------------
-    # STEP 2: Extract return reason using LLM
+    # STEP 2: Validate order using TOOL (before any LLM call)
+    # (row prefetched by intent_router when available)
     # -------------------------------------------------
-    prompt = f"""
-You are a return assistant for an e-commerce platform.
-
-User message:
-"{user_text}"
-
-Order ID: {order_id}
-
-Task:
-- Extract the return reason from the user's message.
-- If no clear reason is mentioned, infer a generic reason like:
-  "Customer requested return".
-
-Respond with ONLY the return reason text.
-"""
-    return_reason = llm.invoke(prompt).content.strip()
-    if not return_reason:
-        return_reason = "Customer requested return"
-
-    # -------------------------------------------------
-    # STEP 3: Validate order using TOOL
-    # -------------------------------------------------
-    order = validate_order(order_id, user_id)
+    prefetched, row = get_prefetched_order(state, order_id)
+    if prefetched:
+        order = (row["id"], row["status"]) if row else None
+    else:
+        order = await asyncio.to_thread(validate_order, order_id, user_id)
 
     if not order:
         state["messages"].append(
@@ -118,7 +82,7 @@ Respond with ONLY the return reason text.
     order_db_id, order_status = order  # 🔴 NEW: unpack status
 
     # -------------------------------------------------
-    # 🔴 STEP 3.1: CHECK IF RETURN ALREADY REQUESTED
+    # 🔴 STEP 2.1: CHECK IF RETURN ALREADY REQUESTED
     # -------------------------------------------------
     if order_status == "RETURN_REQUESTED":
         state["messages"].append(
@@ -131,10 +95,35 @@ Respond with ONLY the return reason text.
         )
         return state
 
+    # -------------------------------------------------
+    # STEP 3: Extract return reason using LLM
+    # -------------------------------------------------
+    prompt = f"""
+You are a return assistant for an e-commerce platform.
+
+User message:
+"{user_text}"
+
+Order ID: {order_id}
+
+Task:
+- Extract the return reason from the user's message.
+- If no clear reason is mentioned, infer a generic reason like:
+  "Customer requested return".
+
+Respond with ONLY the return reason text.
+"""
+    try:
+        return_reason = (await ainvoke_llm(prompt, agent="return_agent")).strip()
+    except LLMUnavailable:
+        return_reason = offline.extract_return_reason(user_text)
+    if not return_reason:
+        return_reason = "Customer requested return"
+
     # -------------------------------------------------
     # STEP 4: Create return request
     # -------------------------------------------------
-    create_return_request(user_id, order_id, return_reason)
+    await asyncio.to_thread(create_return_request, user_id, order_id, return_reason)
 
     # -------------------------------------------------
     # STEP 5: Respond to user
@@ -1,27 +1,16 @@
+import json
+import asyncio
 from langchain_core.messages import AIMessage
-from langchain_groq import ChatGroq
 from datetime import datetime, timedelta
-from backend.db import get_connection
+from backend.db import db_connection
+from backend.llm import LLMUnavailable, ainvoke_llm
+from backend import offline
 from backend.graph.state import ConversationState, get_last_human_message
 from dotenv import load_dotenv
 import uuid
 
 load_dotenv()
 
-# -----------------------------
-# Database connection
-# -----------------------------
-conn = get_connection()
-cursor = conn.cursor()
-
-# -----------------------------
-# LLM for agent reasoning
-# -----------------------------
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0
-)
-
 # =====================================================================
 # TOOL 1: Generate ticket ID
 # =====================================================================
@@ -33,20 +22,20 @@ def generate_ticket_id():
 # TOOL 2: Create support ticket
 # =====================================================================
 def create_ticket(ticket_num, user_id, order_id, issue, status):
-    cursor.execute(
-        """
-        INSERT INTO support_tickets (ticket_num, user_id, order_id, issue, status)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (ticket_num, user_id, order_id, issue, status)
-    )
-    conn.commit()
+    with db_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO support_tickets (ticket_num, user_id, order_id, issue, status)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (ticket_num, user_id, order_id, issue, status)
+        )
 
 
 # =====================================================================
 # AGENT: Ticket Agent
 # =====================================================================
-def ticket_agent(state: ConversationState) -> ConversationState:
+async def ticket_agent(state: ConversationState) -> ConversationState:
     """
     LLM-powered Ticket Agent.
     Supports:
@@ -67,7 +56,8 @@ def ticket_agent(state: ConversationState) -> ConversationState:
     if escalation_reason :
         issue = f"Escalated Reason: {escalation_reason}"
 
-        create_ticket(
+        await asyncio.to_thread(
+            create_ticket,
             ticket_num=ticket_num,
             user_id=user_id,
             order_id=None,
@@ -124,8 +114,12 @@ Respond ONLY in JSON:
 }}
 """
     try:
-        issue_data = eval(llm.invoke(issue_prompt).content.strip())
+        issue_data = json.loads(
+            (await ainvoke_llm(issue_prompt, agent="ticket_agent", json_mode=True)).strip()
+        )
         issue = issue_data.get("issue")
+    except LLMUnavailable:
+        issue = offline.extract_issue(user_text)
     except Exception:
         issue = None
 
@@ -146,7 +140,8 @@ Respond ONLY in JSON:
     # =====================================================
     # STEP 5: Create normal support ticket
     # =====================================================
-    create_ticket(
+    await asyncio.to_thread(
+        create_ticket,
         ticket_num=ticket_num,
         user_id=user_id,
         order_id=order_id,
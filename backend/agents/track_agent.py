@@ -1,72 +1,195 @@
+import os
+import re
+import asyncio
+import numpy as np
 from langchain_core.messages import AIMessage
-from langchain_groq import ChatGroq
-from backend.db import get_connection
-from backend.graph.state import ConversationState, get_last_human_message
+from backend.db import HOT_QUERIES, db_connection
+from backend.llm import LLMUnavailable, ainvoke_llm
+from backend.graph.state import ConversationState, get_last_human_message, get_prefetched_order
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime
 
 load_dotenv()
 
-# -----------------------------
-# Database connection
-# -----------------------------
-conn = get_connection()
-cursor = conn.cursor()
+# 0 = DB + template only (no LLM call); 1 = add a friendly LLM sentence,
+# generated once per (status, delivery bucket) and reused
+TRACK_LLM_EXPLANATION = os.getenv("TRACK_LLM_EXPLANATION", "0") == "1"
 
-# -----------------------------
-# LLM for agent reasoning
-# -----------------------------
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0
-)
+# "Track all my orders": orders per reply page
+TRACK_ALL_PAGE_SIZE = int(os.getenv("TRACK_ALL_PAGE_SIZE", "10"))
+
+# non-delivery days on top of weekends: comma-separated ISO dates, or a
+# file with one date per line ("2026-12-25,2027-01-01")
+DELIVERY_HOLIDAYS = os.getenv("DELIVERY_HOLIDAYS", "")
+
+# delivery window, in business days after the order date
+DELIVERY_MIN_DAYS = 5
+DELIVERY_MAX_DAYS = 7
 
 # =====================================================================
 # TOOL: Fetch order status
 # =====================================================================
 def get_order_status(order_id: str, user_id: str):
-    cursor.execute(
-        """
-        SELECT status, product_name, quantity, order_date
-        FROM orders
-        WHERE order_id = ? AND user_id = ?
-        """,
-        (order_id, user_id)
-    )
-    return cursor.fetchone()
+    sql, _ = HOT_QUERIES["get_order_status"]
+    with db_connection() as conn:
+        return conn.execute(sql, (order_id, user_id)).fetchone()
+
+
+def list_user_orders(user_id: str):
+    """
+    All of the user's orders, newest first (one idx_orders_user_date scan).
+    """
+    sql, _ = HOT_QUERIES["list_user_orders"]
+    with db_connection() as conn:
+        return conn.execute(sql, (user_id,)).fetchall()
+
+
+# -----------------------------
+# Business-day calendar (Mon–Fri minus DELIVERY_HOLIDAYS)
+# -----------------------------
+_calendar = None
+
+
+def _read_holidays(value: str):
+    if value and os.path.isfile(value):
+        with open(value, encoding="utf-8") as f:
+            value = f.read()
+    return [day for day in re.split(r"[,\s]+", value) if day]
+
+
+def get_delivery_calendar() -> np.busdaycalendar:
+    global _calendar
+    if _calendar is None:
+        _calendar = np.busdaycalendar(weekmask="1111100", holidays=_read_holidays(DELIVERY_HOLIDAYS))
+    return _calendar
 
 
-# Helper function: Add business days (Mon–Fri)
 def add_business_days(start_date: datetime, days: int) -> datetime:
     """
-    Add business days (Mon–Fri) to a date.
+    Add business days (Mon–Fri, minus holidays) to a date.
     """
-    current_date = start_date
-    added_days = 0
+    # roll="backward": a weekend / holiday order counts from the
+    # business day before, i.e. the first day counted is the next one
+    day = np.busday_offset(
+        np.datetime64(start_date.date()), days, roll="backward", busdaycal=get_delivery_calendar()
+    )
+    return datetime.combine(day.item(), start_date.time())
 
-    while added_days < days:
-        current_date += timedelta(days=1)
-        if current_date.weekday() < 5:  # Monday–Friday
-            added_days += 1
 
-    return current_date
+def delivery_windows(order_dates):
+    """
+    (starts, ends) datetime64[D] arrays for many order dates at once.
+    """
+    days = np.array([order_date[:10] for order_date in order_dates], dtype="datetime64[D]")
+    calendar = get_delivery_calendar()
+    starts = np.busday_offset(days, DELIVERY_MIN_DAYS, roll="backward", busdaycal=calendar)
+    ends = np.busday_offset(days, DELIVERY_MAX_DAYS, roll="backward", busdaycal=calendar)
+    return starts, ends
+
+
+# =====================================================================
+# Optional friendly explanation (TRACK_LLM_EXPLANATION=1)
+# =====================================================================
+# (status, bucket) -> sentence; the prompt carries no order details, so
+# one answer serves every order in that state
+_explanations = {}
+
+
+def delivery_bucket(estimated_start: datetime, estimated_end: datetime, now: datetime = None) -> str:
+    """
+    Where today falls relative to the delivery window.
+    """
+    today = (now or datetime.now()).date()
+    if today < estimated_start.date():
+        return "before the delivery window"
+    if today <= estimated_end.date():
+        return "within the delivery window"
+    return "past the delivery window"
+
+
+async def friendly_explanation(status: str, bucket: str):
+    """
+    Short reassuring sentence for (status, bucket), or None if the LLM
+    is unavailable. Consults the LLM at most once per key per process
+    (and the response cache shares it across workers).
+    """
+    key = (status, bucket)
+    if key in _explanations:
+        return _explanations[key]
+
+    prompt = f"""
+You are a customer support assistant.
+
+An order has status "{status}" and today is {bucket}.
+
+In ONE short, friendly sentence, explain what this status means for
+the customer. Do not mention order IDs, products or dates.
+"""
+    try:
+        explanation = (await ainvoke_llm(prompt, agent="track_agent")).strip()
+    except LLMUnavailable:
+        return None
+
+    _explanations[key] = explanation
+    return explanation
+
+
+# =====================================================================
+# Bulk mode: "Track all my orders"
+# =====================================================================
+def render_orders_page(rows, page: int, page_size: int = TRACK_ALL_PAGE_SIZE) -> str:
+    """
+    One page of the user's orders with their delivery windows.
+    """
+    if not rows:
+        return "📭 You don't have any orders yet.\n\n*Example: Order 2 wireless headphones*"
+
+    pages = (len(rows) + page_size - 1) // page_size
+    page = min(max(page, 1), pages)
+    shown = rows[(page - 1) * page_size:page * page_size]
+
+    starts, ends = delivery_windows([row[4] for row in shown])
+
+    lines = [f"📦 **YOUR ORDERS** ({len(rows)} total, page {page} of {pages})\n"]
+    for (order_id, product_name, quantity, status, order_date), start, end in zip(
+        shown, starts.tolist(), ends.tolist()
+    ):
+        lines.append(
+            f"🆔 {order_id} · **{status}**\n"
+            f"🛍️ {product_name} × {quantity} · 📅 {order_date[:10]}\n"
+            f"🚚 {start.strftime('%d %b')} – {end.strftime('%d %b %Y')}\n"
+        )
+    if page < pages:
+        lines.append(f"*More: Track all my orders page {page + 1}*")
+    return "\n".join(lines)
+
+
+async def track_all_orders(state: ConversationState, page: int) -> ConversationState:
+    rows = await asyncio.to_thread(list_user_orders, state["user_id"])
+    state["messages"].append(AIMessage(content=render_orders_page(rows, page)))
+    return state
 
 
 # =====================================================================
 # AGENT: Track Agent
 # =====================================================================
-def track_agent(state: ConversationState) -> ConversationState:
+async def track_agent(state: ConversationState) -> ConversationState:
     """
-    LLM-powered Track Agent.
+    Track Agent (DB + template; no LLM call by default).
     - Uses router-provided order_id
     - Fetches order details from DB
     - Computes delivery ETA logically (5–7 business days)
-    - Uses LLM only for friendly explanation
+    - "Track all my orders": one query, one paginated reply
+    - Optional cached LLM sentence (TRACK_LLM_EXPLANATION=1)
     """
 
     user_id = state["user_id"]
     order_id = state.get("active_order_id")
 
+    # "Track all my orders" (set by intent_router this turn)
+    if state.get("track_all_page") is not None:
+        return await track_all_orders(state, state["track_all_page"])
+
     # -------------------------------------------------
     # STEP 1: Ensure order ID exists
     # -------------------------------------------------
@@ -83,8 +206,16 @@ def track_agent(state: ConversationState) -> ConversationState:
 
     # -------------------------------------------------
     # STEP 2: Fetch order details
+    # (row prefetched by intent_router when available)
     # -------------------------------------------------
-    order = get_order_status(order_id, user_id)
+    prefetched, row = get_prefetched_order(state, order_id)
+    if prefetched:
+        order = (
+            (row["status"], row["product_name"], row["quantity"], row["order_date"])
+            if row else None
+        )
+    else:
+        order = await asyncio.to_thread(get_order_status, order_id, user_id)
 
     if not order:
         state["messages"].append(
@@ -105,8 +236,8 @@ def track_agent(state: ConversationState) -> ConversationState:
     # -------------------------------------------------
     # STEP 4: Compute estimated delivery (5–7 business days)
     # -------------------------------------------------
-    estimated_start = add_business_days(order_datetime, 5)
-    estimated_end = add_business_days(order_datetime, 7)
+    estimated_start = add_business_days(order_datetime, DELIVERY_MIN_DAYS)
+    estimated_end = add_business_days(order_datetime, DELIVERY_MAX_DAYS)
 
     estimated_delivery_str = (
         f"{estimated_start.strftime('%d %b %Y')} – "
@@ -114,30 +245,12 @@ def track_agent(state: ConversationState) -> ConversationState:
     )
 
     # -------------------------------------------------
-    # STEP 5: LLM explanation (language only)
+    # STEP 5: Optional friendly explanation (cached per status)
     # -------------------------------------------------
-    explanation_prompt = f"""
-You are a customer support assistant.
-
-Order details:
-- Order ID: {order_id}
-- Product: {product_name}
-- Quantity: {quantity}
-- Order Date: {order_date_str}
-- Status: {status}
-- Estimated Delivery Window: {estimated_delivery_str}
-
-Explain the order status clearly and reassuringly.
-Mention the estimated delivery window.
-Keep it short and friendly.
-"""
-
-    try:
-        status_explanation = llm.invoke(explanation_prompt).content.strip()
-    except Exception:
-        status_explanation = (
-            f"Your order is currently **{status}** and is expected to arrive "
-            f"between {estimated_delivery_str}."
+    explanation = None
+    if TRACK_LLM_EXPLANATION:
+        explanation = await friendly_explanation(
+            status, delivery_bucket(estimated_start, estimated_end)
         )
 
     # -------------------------------------------------
@@ -153,7 +266,7 @@ Keep it short and friendly.
                 f"📅 Order Placed On: {order_date_str}\n\n"
                 f"📍 Status: **{status}**\n\n"
                 f"🚚 Estimated Delivery: **{estimated_delivery_str}**"
-                
+                + (f"\n\n💬 {explanation}" if explanation else "")
             )
         )
     )
@@ -0,0 +1,256 @@
+# catalog.py
+"""
+Product catalog: resolve free-text product names to catalog entries.
+
+- products holds one row per SKU (product_id); products_fts is a
+  porter-stemmed FTS5 index over name + category ("headphones" matches
+  "Headphone"), kept in sync by triggers (migration 5)
+- resolve_product() maps the text order_agent extracted ("2 wireless
+  headphones" -> "wireless headphones") to a SKU only when that is
+  unambiguous: an exact name, or the one product whose name has exactly
+  the query's words. Otherwise it returns bm25-ranked candidates
+  (all words, then all but one) for the user to choose from, so no
+  arbitrary brand / variant is ever ordered
+- load_products_csv() bulk-loads / upserts a CSV in batched executemany
+  calls inside one transaction, with the per-row FTS triggers swapped
+  for one index rebuild at the end; malformed rows are skipped and
+  reported
+
+CLI:
+    python -m backend.catalog load products.csv      # product_id,name,category,price
+    python -m backend.catalog resolve "wireless headphones"
+"""
+import re
+import csv
+import sys
+import time
+import argparse
+
+from backend.db import DB_NAME, HOT_QUERIES, db_connection, init_db
+
+CATALOG_LOAD_BATCH = 10000
+CATALOG_CANDIDATES = 50   # FTS rows fetched per lookup (bm25 order)
+CATALOG_SUGGESTIONS = 5   # candidates offered when ambiguous
+
+# queries this long also try every "all words but one" match
+# (typos, model numbers, filler words)
+MIN_FUZZY_TERMS = 3
+
+_TOKEN = re.compile(r"\w+")
+
+EXACT_SQL, _ = HOT_QUERIES["resolve_product_exact"]
+# ranked inside the FTS subquery (name hits weigh 10x category hits);
+# scoring every hit is the cost: ~25 ms for a word in 15k of 300k names
+MATCH_SQL = """
+SELECT p.product_id, p.name
+FROM (
+    SELECT rowid, bm25(products_fts, 10.0, 1.0) AS score
+    FROM products_fts WHERE products_fts MATCH ?
+    ORDER BY score LIMIT ?
+) AS hit
+JOIN products p ON p.id = hit.rowid
+ORDER BY hit.score
+"""
+# dropped + recreated around bulk loads; must match the triggers the
+# latest migration creates (migration 5 keeps its own copy)
+PRODUCTS_FTS_TRIGGERS = {
+    "products_ai": """
+    CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, category) VALUES (new.id, new.name, new.category);
+    END
+    """,
+    "products_ad": """
+    CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category)
+        VALUES ('delete', old.id, old.name, old.category);
+    END
+    """,
+    "products_au": """
+    CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category)
+        VALUES ('delete', old.id, old.name, old.category);
+        INSERT INTO products_fts (rowid, name, category) VALUES (new.id, new.name, new.category);
+    END
+    """,
+}
+
+UPSERT_SQL = """
+INSERT INTO products (product_id, name, category, price)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (product_id) DO UPDATE SET
+    name = excluded.name,
+    category = excluded.category,
+    price = excluded.price
+"""
+
+
+# -----------------------------
+# Resolver
+# -----------------------------
+def _fold(word: str) -> str:
+    # rough plural folding (the index itself is porter-stemmed)
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _terms(text: str):
+    return _TOKEN.findall(text.lower())
+
+
+def _words(text: str):
+    return {_fold(word) for word in _terms(text)}
+
+
+def _fts_query(terms) -> str:
+    # quoted so catalog words like "and" / "near" are never FTS operators
+    return " AND ".join(f'"{term}"' for term in terms)
+
+
+def _candidates(conn, terms):
+    return [
+        {"product_id": product_id, "name": name}
+        for product_id, name in conn.execute(MATCH_SQL, (_fts_query(terms), CATALOG_CANDIDATES))
+    ]
+
+
+def resolve_product(text: str, db_path: str = DB_NAME) -> dict:
+    """
+    {"match": {"product_id", "name"} | None, "candidates": [...]}
+
+    match is set for an exact name or the single product named by
+    exactly the query's words; otherwise candidates holds up to
+    CATALOG_SUGGESTIONS bm25-ranked products to ask the user about
+    (empty if nothing in the catalog is close).
+    """
+    terms = _terms(text or "")
+    if not terms:
+        return {"match": None, "candidates": []}
+
+    with db_connection(db_path) as conn:
+        row = conn.execute(EXACT_SQL, (text.strip(),)).fetchone()
+        if row:
+            return {"match": {"product_id": row[0], "name": row[1]}, "candidates": []}
+
+        # every word present
+        candidates = _candidates(conn, terms)
+        if len(candidates) == 1:
+            return {"match": candidates[0], "candidates": []}
+        if candidates:
+            query = _words(text)
+            same = [c for c in candidates if _words(c["name"]) == query]
+            if len(same) == 1:
+                return {"match": same[0], "candidates": []}
+            return {"match": None, "candidates": candidates[:CATALOG_SUGGESTIONS]}
+
+        # all but one word (typos, model numbers, filler): suggestions only
+        if len(terms) >= MIN_FUZZY_TERMS:
+            for skip in range(len(terms) - 1, -1, -1):
+                candidates = _candidates(conn, terms[:skip] + terms[skip + 1:])
+                if candidates:
+                    return {"match": None, "candidates": candidates[:CATALOG_SUGGESTIONS]}
+
+    return {"match": None, "candidates": []}
+
+
+# -----------------------------
+# Bulk loader
+# -----------------------------
+def _csv_rows(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for record in reader:
+            product_id = (record.get("product_id") or record.get("sku") or "").strip()
+            name = (record.get("name") or record.get("product_name") or "").strip()
+            if not product_id or not name:
+                print(f"⚠️ {path}:{reader.line_num}: skipped, missing product_id or name")
+                continue
+            price = (record.get("price") or "").strip()
+            try:
+                price = float(price) if price else None
+            except ValueError:
+                print(f"⚠️ {path}:{reader.line_num}: skipped, bad price {price!r}")
+                continue
+            yield (
+                product_id,
+                name,
+                (record.get("category") or "").strip() or None,
+                price,
+            )
+
+
+def load_products(rows, batch_size: int = CATALOG_LOAD_BATCH, db_path: str = DB_NAME) -> int:
+    """
+    Upsert (product_id, name, category, price) rows in ONE transaction.
+    The FTS triggers are dropped for the load and the index rebuilt
+    once (~1 s per 300k SKUs vs. one FTS update per row); readers never
+    see the catalog without its index.
+    """
+    loaded = 0
+    batch = []
+    with db_connection(db_path) as conn:
+        # explicit: sqlite3 would autocommit the DROPs (no DML yet), so a
+        # failed load would leave the catalog without its triggers
+        conn.execute("BEGIN IMMEDIATE")
+        for name in PRODUCTS_FTS_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(UPSERT_SQL, batch)
+                loaded += len(batch)
+                batch.clear()
+        if batch:
+            conn.executemany(UPSERT_SQL, batch)
+            loaded += len(batch)
+        conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+        for statement in PRODUCTS_FTS_TRIGGERS.values():
+            conn.execute(statement)
+    return loaded
+
+
+def load_products_csv(path: str, batch_size: int = CATALOG_LOAD_BATCH, db_path: str = DB_NAME) -> int:
+    return load_products(_csv_rows(path), batch_size, db_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NovaCart product catalog")
+    parser.add_argument("--db", default=DB_NAME)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="bulk load / upsert a products CSV")
+    load.add_argument("csv_path", help="columns: product_id (or sku), name, category, price")
+    load.add_argument("--batch", type=int, default=CATALOG_LOAD_BATCH)
+
+    resolve = commands.add_parser("resolve", help="resolve product text to a SKU")
+    resolve.add_argument("text")
+
+    args = parser.parse_args(argv)
+    init_db(args.db)
+
+    if args.command == "load":
+        started = time.perf_counter()
+        loaded = load_products_csv(args.csv_path, args.batch, args.db)
+        elapsed = time.perf_counter() - started
+        print(f"✅ Loaded {loaded} products in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):,.0f} rows/s)")
+        return 0
+
+    started = time.perf_counter()
+    result = resolve_product(args.text, args.db)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    match = result["match"]
+    if match is not None:
+        print(f"✅ {match['product_id']}  {match['name']}  ({elapsed_ms:.2f} ms)")
+        return 0
+    if result["candidates"]:
+        print(f"🤔 Ambiguous {args.text!r} ({elapsed_ms:.2f} ms):")
+        for candidate in result["candidates"]:
+            print(f"   {candidate['product_id']}  {candidate['name']}")
+        return 1
+    print(f"❌ No catalog match for {args.text!r} ({elapsed_ms:.2f} ms)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
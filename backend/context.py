@@ -0,0 +1,144 @@
+# context.py
+"""
+Token-budgeted conversation context for agent prompts.
+
+- the newest turns from conversation_memory are packed up to
+  CONTEXT_TOKEN_BUDGET - SUMMARY_TOKEN_BUDGET - SUMMARY_REFRESH_TOKENS tokens
+- turns that fall out of that window are shown verbatim next to the
+  rolling summary until they reach SUMMARY_REFRESH_TOKENS; only then are
+  they folded into it (conversation_summaries) with one LLM call, so
+  most turns spend none of the request's LLM budget on the summary
+- prompt size therefore stays constant however long the conversation is
+"""
+import os
+import asyncio
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from backend.memory import load_turns_since, load_summary, save_summary
+from backend.llm import ainvoke_llm
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "800"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "200"))
+SUMMARY_REFRESH_TOKENS = int(os.getenv("SUMMARY_REFRESH_TOKENS", "150"))
+
+# Unsummarized rows read per turn. The backlog is normally one window +
+# SUMMARY_REFRESH_TOKENS; older rows beyond this (legacy sessions) are
+# dropped rather than summarized.
+CONTEXT_SCAN_LIMIT = 200
+
+
+# -----------------------------
+# Token accounting
+# -----------------------------
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap estimate (~4 chars per token for English); no tokenizer needed.
+    """
+    return len(text or "") // 4 + 1
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    max_chars = budget * 4
+    if len(text) <= max_chars:
+        return text
+    return "…" + text[-max_chars:]   # keep the most recent part
+
+
+def pack_recent_turns(rows, budget: int):
+    """
+    Split rows (oldest first) into (overflow, recent): recent is the
+    longest newest suffix that fits the budget.
+    """
+    used = 0
+    cut = len(rows)
+    for i in range(len(rows) - 1, -1, -1):
+        cost = estimate_tokens(rows[i][2]) + 4   # + role / separator overhead
+        if used + cost > budget:
+            break
+        used += cost
+        cut = i
+    return rows[:cut], rows[cut:]
+
+
+# -----------------------------
+# Rolling summary
+# -----------------------------
+def rows_tokens(rows) -> int:
+    return sum(estimate_tokens(content) + 4 for _, _, content in rows)
+
+
+def format_transcript(rows) -> str:
+    return "\n".join(
+        f"{'Customer' if role == 'human' else 'Assistant'}: {content}"
+        for _, role, content in rows
+    )
+
+
+async def update_summary(previous: str, rows) -> str:
+    transcript = format_transcript(rows)
+    prompt = f"""
+You maintain a running summary of a customer support conversation.
+
+Current summary:
+{previous or "(empty)"}
+
+New conversation turns:
+{transcript}
+
+Update the summary with the new turns. Keep order IDs, products,
+requests and their outcomes. Use at most {SUMMARY_TOKEN_BUDGET * 3 // 4} words.
+
+Respond with ONLY the updated summary.
+"""
+    try:
+        # runs inside the faq_llm node: keep it out of the token stream
+        summary = (await ainvoke_llm(prompt, agent="context_summary", stream=False)).strip()
+    except Exception:
+        summary = ""
+
+    if not summary:
+        summary = f"{previous}\n{transcript}".strip()
+
+    return truncate_to_tokens(summary, SUMMARY_TOKEN_BUDGET)
+
+
+# -----------------------------
+# Context builder
+# -----------------------------
+async def build_context(session_id: str):
+    """
+    [SystemMessage(summary)?] + recent Human/AI messages, within budget.
+    """
+    summary, summarized_upto = await asyncio.to_thread(load_summary, session_id)
+    rows = await asyncio.to_thread(
+        load_turns_since, session_id, summarized_upto, CONTEXT_SCAN_LIMIT
+    )
+
+    overflow, recent = pack_recent_turns(
+        rows, CONTEXT_TOKEN_BUDGET - SUMMARY_TOKEN_BUDGET - SUMMARY_REFRESH_TOKENS
+    )
+
+    # fold in batches: one summary call per SUMMARY_REFRESH_TOKENS of
+    # overflow, not one per turn. Unflushed rows (id=None) wait for an id.
+    folded = [row for row in overflow if row[0] is not None]
+    if folded and rows_tokens(overflow) >= SUMMARY_REFRESH_TOKENS:
+        summary = await update_summary(summary, folded)
+        await asyncio.to_thread(save_summary, session_id, summary, folded[-1][0])
+        overflow = [row for row in overflow if row[0] is None]
+
+    earlier = summary
+    if overflow:
+        transcript = truncate_to_tokens(format_transcript(overflow), SUMMARY_REFRESH_TOKENS)
+        earlier = f"{summary}\n{transcript}".strip()
+
+    messages = []
+    if earlier:
+        messages.append(
+            SystemMessage(content=f"Summary of the earlier conversation:\n{earlier}")
+        )
+    for _, role, content in recent:
+        if role == "human":
+            messages.append(HumanMessage(content=content))
+        else:
+            messages.append(AIMessage(content=content))
+
+    return messages
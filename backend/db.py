@@ -1,114 +1,236 @@
 # backend/db.py
 import sqlite3
 import os
+import queue
+import threading
+from contextlib import contextmanager
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_NAME = os.path.join(BASE_DIR, "orders.db")
+DB_NAME = os.getenv("ORDERS_DB_PATH", os.path.join(BASE_DIR, "orders.db"))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_STATEMENT_CACHE = 256    # per-connection prepared statement cache
 
 
 # -------------------------------------------------
-# Users table
+# Main DB initialization (SINGLE SOURCE OF TRUTH)
 # -------------------------------------------------
-def init_users_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        user_id TEXT PRIMARY KEY,
-        username TEXT UNIQUE,
-        password TEXT
-    )
-    """)
+def init_db(db_path: str = DB_NAME):
+    """
+    Apply pending schema migrations (see backend/migrations.py).
+    A no-op single version check when the schema is current.
+    """
+    from backend.migrations import migrate
 
-    conn.commit()
-    conn.close()
+    migrate(db_path)
 
 
 # -------------------------------------------------
-# Main DB initialization (SINGLE SOURCE OF TRUTH)
+# Hot queries (their indexes are created by backend/migrations.py)
 # -------------------------------------------------
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    # -----------------------------
-    # Orders table (existing schema)
-    # -----------------------------
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS orders (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT,
-        order_id TEXT UNIQUE,
-        product_id TEXT,
-        product_name TEXT,
-        status TEXT,
-        return_reason TEXT,
-        return_date TIMESTAMP,
-        order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    # -----------------------------
-    # 🔄 Migration: add quantity column
-    # -----------------------------
-    cursor.execute("PRAGMA table_info(orders)")
-    columns = [col[1] for col in cursor.fetchall()]
-
-    if "quantity" not in columns:
-        cursor.execute(
-            "ALTER TABLE orders ADD COLUMN quantity INTEGER DEFAULT 1"
-        )
-
-    # -----------------------------
-    # 🔄 Migration: add payment_mode column
-    # -----------------------------
-    if "payment_mode" not in columns:
-        cursor.execute(
-            "ALTER TABLE orders ADD COLUMN payment_mode TEXT DEFAULT 'COD'"
-        )
-
-    # -----------------------------
-    # Support tickets table
-    # -----------------------------
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS support_tickets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ticket_num TEXT,
-        user_id TEXT,
-        order_id TEXT,
-        issue TEXT,
-        status TEXT,
-        ticket_created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    # -----------------------------
-    # Returns table
-    # -----------------------------
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS returns (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT,
-        order_id TEXT,
-        reason TEXT,
-        status TEXT,
-        return_created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
+# Every query on the request path. benchmarks/query_plans.py runs
+# EXPLAIN QUERY PLAN on each and fails if any falls back to a scan.
+HOT_QUERIES = {
+    "get_order": (
+        "SELECT id, order_id, user_id, status, product_name, quantity, order_date "
+        "FROM orders WHERE order_id = ? AND user_id = ?",
+        ("ORD-X", "user_x"),
+    ),
+    "get_order_status": (
+        "SELECT status, product_name, quantity, order_date FROM orders "
+        "WHERE order_id = ? AND user_id = ?",
+        ("ORD-X", "user_x"),
+    ),
+    "validate_order": (
+        "SELECT id, status FROM orders WHERE order_id=? AND user_id=?",
+        ("ORD-X", "user_x"),
+    ),
+    "update_return_status": (
+        "UPDATE orders SET status = ?, return_reason = ? WHERE order_id = ?",
+        ("RETURN_REQUESTED", "reason", "ORD-X"),
+    ),
+    "list_order_items": (
+        "SELECT line_no, product_id, product_name, quantity FROM order_items "
+        "WHERE order_id = ? ORDER BY line_no",
+        ("ORD-X",),
+    ),
+    "list_user_orders": (
+        "SELECT order_id, product_name, quantity, status, order_date FROM orders "
+        "WHERE user_id = ? ORDER BY order_date DESC",
+        ("user_x",),
+    ),
+    "list_user_tickets": (
+        "SELECT ticket_num, order_id, status FROM support_tickets "
+        "WHERE user_id = ? ORDER BY ticket_created_date DESC",
+        ("user_x",),
+    ),
+    "list_order_tickets": (
+        "SELECT ticket_num, status FROM support_tickets WHERE order_id = ?",
+        ("ORD-X",),
+    ),
+    "list_user_returns": (
+        "SELECT order_id, reason, status FROM returns "
+        "WHERE user_id = ? ORDER BY return_created_date DESC",
+        ("user_x",),
+    ),
+    "list_order_returns": (
+        "SELECT reason, status FROM returns WHERE order_id = ?",
+        ("ORD-X",),
+    ),
+    "login": (
+        "SELECT user_id FROM users WHERE username=? AND password=?",
+        ("alice", "secret"),
+    ),
+    # catalog exact-name lookup (the FTS5 MATCH path is an index lookup
+    # too, but EXPLAIN reports virtual tables as "SCAN ... VIRTUAL TABLE")
+    "resolve_product_exact": (
+        "SELECT product_id, name FROM products WHERE name = ? COLLATE NOCASE LIMIT 1",
+        ("wireless headphones",),
+    ),
+}
 
-    conn.commit()
-    conn.close()
 
-    # Initialize users table
-    init_users_db()
+# -------------------------------------------------
+# Shared order lookup (router prefetch + agents)
+# -------------------------------------------------
+def get_order(order_id: str, user_id: str):
+    """
+    The order as a dict, or None if it doesn't exist for this user.
+    """
+    sql, _ = HOT_QUERIES["get_order"]
+    with db_connection() as conn:
+        cursor = conn.execute(sql, (order_id, user_id))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip((col[0] for col in cursor.description), row))
+
+
+def explain_query_plan(conn, sql: str, params=()):
+    """
+    Return the EXPLAIN QUERY PLAN detail lines for one query.
+    """
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def find_table_scans(conn):
+    """
+    {query_name: plan} for every HOT_QUERY that does a full table scan.
+    """
+    scans = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = explain_query_plan(conn, sql, params)
+        # "SCAN orders" (>= 3.36) / "SCAN TABLE orders" (older); a full
+        # "SCAN ... USING COVERING INDEX" is still O(n), so it fails too
+        if any(detail.startswith("SCAN") for detail in plan):
+            scans[name] = plan
+    return scans
 
 
 # -------------------------------------------------
 # DB connection helper
 # -------------------------------------------------
-def get_connection():
-    return sqlite3.connect(DB_NAME, check_same_thread=False)
+def get_connection(path: str = DB_NAME):
+    """
+    Open ONE tuned connection (WAL, busy_timeout, statement cache).
+    Request handlers should use db_connection() instead.
+    """
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=DB_STATEMENT_CACHE,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+# -------------------------------------------------
+# Connection pool
+# -------------------------------------------------
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections.
+
+    A connection is owned by exactly one thread between acquire() and
+    release(), so cursors are never shared. Connections stay open, so
+    each one's prepared statement cache is reused across requests.
+    """
+
+    def __init__(self, path: str = DB_NAME, size: int = DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return get_connection(self.path)
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        # pool exhausted: wait for a connection to come back
+        return self._idle.get(timeout=timeout)
+
+    def release(self, conn):
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Transaction scope: commit on success, rollback on error.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str = DB_NAME) -> ConnectionPool:
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = ConnectionPool(path)
+        return _pools[path]
+
+
+def db_connection(path: str = DB_NAME):
+    """
+    with db_connection() as conn:
+        conn.execute(...)
+    """
+    return get_pool(path).connection()
 
 
 
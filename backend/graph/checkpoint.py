@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+from backend.db import db_connection
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSION_STATE_DB = os.getenv(
+    "SESSION_STATE_DB", os.path.join(BASE_DIR, "session_state.db")
+)
+
+# 1 = one app process owns session_state.db: LRU hits are trusted and
+# never touch disk. 0 (default, several uvicorn workers): every turn
+# re-reads the row, since another worker may have changed the session.
+SESSION_STATE_SINGLE_WORKER = os.getenv("SESSION_STATE_SINGLE_WORKER", "0") == "1"
+SESSION_STATE_TTL_DAYS = int(os.getenv("SESSION_STATE_TTL_DAYS", "30"))   # since last turn
+SESSION_STATE_PURGE_INTERVAL = 3600   # seconds between expiry sweeps
+
+# ----------------------------------
+# Conversation slots that survive between turns
+# ----------------------------------
+# escalation_reason is deliberately NOT persisted: it is a per-turn
+# signal, otherwise every later ticket would become an escalation.
+SESSION_SLOTS = ("active_order_id", "pending_intent", "order_context")
+
+JSON_SLOTS = {"order_context"}
+
+
+def _encode(slot: str, value):
+    return json.dumps(value) if slot in JSON_SLOTS and value is not None else value
+
+
+class SessionCheckpointer:
+    """
+    Per-session graph checkpointer.
+
+    - SQLite file keyed by session_id (one row per session, pooled
+      connections)
+    - in-process LRU of the slots as last read / written; trusted
+      without a disk read only with SESSION_STATE_SINGLE_WORKER=1
+    - only slots that changed during the turn (vs. what the turn read)
+      are written back, so a concurrent turn in another worker keeps
+      the slots it changed
+    - every save refreshes updated_at; rows idle for
+      SESSION_STATE_TTL_DAYS are purged
+    """
+
+    def __init__(self, path: str = SESSION_STATE_DB, cache_size: int = 4096):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()   # LRU only, never held over disk I/O
+        self._next_purge = 0.0
+
+        with db_connection(path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_state (
+                session_id TEXT PRIMARY KEY,
+                active_order_id TEXT,
+                pending_intent TEXT,
+                order_context TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_session_state_updated ON session_state (updated_at)"
+            )
+
+    # -----------------------------
+    # LRU helpers
+    # -----------------------------
+    def _remember(self, session_id: str, slots: dict):
+        with self._lock:
+            self._cache[session_id] = slots
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cached(self, session_id: str):
+        with self._lock:
+            cached = self._cache.get(session_id)
+            if cached is not None:
+                self._cache.move_to_end(session_id)
+            return cached
+
+    # -----------------------------
+    # Load
+    # -----------------------------
+    def load(self, session_id: str) -> dict:
+        with db_connection(self.path) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(SESSION_SLOTS)} FROM session_state WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+
+        slots = dict.fromkeys(SESSION_SLOTS)
+        if row:
+            for slot, value in zip(SESSION_SLOTS, row):
+                if slot in JSON_SLOTS and value is not None:
+                    value = json.loads(value)
+                slots[slot] = value
+
+        self._remember(session_id, slots)
+        return dict(slots)
+
+    # -----------------------------
+    # Save (delta only)
+    # -----------------------------
+    def save(self, session_id: str, state: dict):
+        new_slots = {slot: state.get(slot) for slot in SESSION_SLOTS}
+        cached = self._cached(session_id)
+
+        with db_connection(self.path) as conn:
+            written = False
+            if cached is not None:
+                # merged into the current row: slots another worker
+                # changed meanwhile are kept. updated_at is bumped even
+                # when no slot changed, so active sessions never expire.
+                changed = [s for s in SESSION_SLOTS if new_slots[s] != cached[s]]
+                written = conn.execute(
+                    f"""
+                    UPDATE session_state SET
+                        {''.join(f'{s} = ?, ' for s in changed)}updated_at = CURRENT_TIMESTAMP
+                    WHERE session_id = ?
+                    """,
+                    (*(_encode(s, new_slots[s]) for s in changed), session_id)
+                ).rowcount > 0
+
+            if not written:
+                # no row yet, or evicted from the LRU mid-turn: write all
+                conn.execute(
+                    f"""
+                    INSERT INTO session_state (session_id, {', '.join(SESSION_SLOTS)})
+                    VALUES (?, {', '.join('?' for _ in SESSION_SLOTS)})
+                    ON CONFLICT(session_id) DO UPDATE SET
+                        {', '.join(f'{s} = excluded.{s}' for s in SESSION_SLOTS)},
+                        updated_at = CURRENT_TIMESTAMP
+                    """,
+                    (session_id, *(_encode(s, new_slots[s]) for s in SESSION_SLOTS))
+                )
+
+            self._maybe_purge(conn)
+
+        self._remember(session_id, new_slots)
+
+    def _maybe_purge(self, conn):
+        now = time.time()
+        with self._lock:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + SESSION_STATE_PURGE_INTERVAL
+        conn.execute(
+            "DELETE FROM session_state WHERE updated_at < datetime('now', ?)",
+            (f"-{SESSION_STATE_TTL_DAYS} days",)
+        )
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._cache.pop(session_id, None)
+        with db_connection(self.path) as conn:
+            conn.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+
+    # -----------------------------
+    # Async API
+    # -----------------------------
+    async def aload(self, session_id: str) -> dict:
+        if SESSION_STATE_SINGLE_WORKER:
+            # trusted cache hits never leave the event loop
+            cached = self._cached(session_id)
+            if cached is not None:
+                return dict(cached)
+        return await asyncio.to_thread(self.load, session_id)
+
+    async def asave(self, session_id: str, state: dict):
+        await asyncio.to_thread(self.save, session_id, state)
+
+
+_checkpointer = None
+
+
+def get_checkpointer() -> SessionCheckpointer:
+    global _checkpointer
+    if _checkpointer is None:
+        _checkpointer = SessionCheckpointer()
+    return _checkpointer
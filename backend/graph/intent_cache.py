@@ -0,0 +1,60 @@
+import os
+import re
+
+from backend.tiered_cache import TieredCache
+
+# ----------------------------------
+# Intent classification cache
+# ----------------------------------
+# "where is my order", "Where is my order ORD-1A2B3C??" -> same key.
+# Memory tier: LRU. Disk tier (optional, INTENT_CACHE_DB): survives
+# restarts and is shared by workers on the same host (see
+# backend/tiered_cache.py).
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "50000"))
+INTENT_CACHE_TTL_SECONDS = float(os.getenv("INTENT_CACHE_TTL_SECONDS", str(30 * 86400)))
+INTENT_CACHE_DB = os.getenv("INTENT_CACHE_DB", "")   # empty = memory only
+
+_ORDER_ID = re.compile(r"\bORD-[A-Za-z0-9]+\b", re.IGNORECASE)
+_NON_WORD = re.compile(r"[^\w<>]+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Case-fold, mask order IDs, collapse punctuation + whitespace.
+    """
+    text = _ORDER_ID.sub(" <order_id> ", text)
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+class IntentCache(TieredCache):
+    """
+    TieredCache keyed by normalize_query(text).
+    """
+
+    def __init__(self, max_size: int = INTENT_CACHE_SIZE, ttl_seconds: float = INTENT_CACHE_TTL_SECONDS,
+                 disk_path: str = INTENT_CACHE_DB):
+        super().__init__("intent_labels", max_size, ttl_seconds, disk_path)
+
+    def get(self, text: str):
+        entry = self.lookup(normalize_query(text))
+        return entry[1] if entry else None
+
+    def put(self, text: str, label: str):
+        self.store(normalize_query(text), label)
+
+    async def aget(self, text: str):
+        entry = await self.alookup(normalize_query(text))
+        return entry[1] if entry else None
+
+    async def aput(self, text: str, label: str):
+        await self.astore(normalize_query(text), label)
+
+
+_intent_cache = None
+
+
+def get_intent_cache() -> IntentCache:
+    global _intent_cache
+    if _intent_cache is None:
+        _intent_cache = IntentCache()
+    return _intent_cache
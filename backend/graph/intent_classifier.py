@@ -0,0 +1,157 @@
+import os
+import threading
+import numpy as np
+from backend.rag.vectorstore import get_embeddings
+
+# ----------------------------------
+# Local intent classifier (nearest centroid over MiniLM embeddings)
+# ----------------------------------
+# Answers in a few ms on CPU; llm_intent_classify only goes to the LLM
+# when the best centroid is not similar / not distinct enough.
+INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "1") == "1"
+INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", "0.45"))
+INTENT_MIN_MARGIN = float(os.getenv("INTENT_MIN_MARGIN", "0.05"))
+
+# ----------------------------------
+# Labeled examples (seeded from Supported_Queries.md and
+# "User Queries For Demo.txt"), labels = llm_intent_classify labels
+# ----------------------------------
+LABELED_EXAMPLES = {
+    "place_order": [
+        "Place an order for headphones",
+        "Order 2 wireless headphones",
+        "Buy a mirror",
+        "I want to order shoes",
+        "Order laptop stand",
+        "Place an order of a Milton water bottle",
+        "I want to purchase",
+        "Add a phone case to my cart",
+        "I would like to buy a smartwatch",
+    ],
+    "track_order": [
+        "Track my order",
+        "Where is my order?",
+        "Check status of my order",
+        "Has my order shipped?",
+        "Track order",
+        "please give me the current status of my order",
+        "When will my package arrive?",
+        "My order has not arrived yet",
+        "Please look into my order, its not yet arrived",
+    ],
+    "return_order": [
+        "I want to return my order",
+        "Return my order because it is damaged",
+        "Wrong item received",
+        "Product defective",
+        "Initiate return",
+        "I want to know if it's possible to send back something I ordered",
+        "Please return my order",
+        "I received the wrong size, I want to send it back",
+    ],
+    "raise_ticket": [
+        "Raise a ticket for my order",
+        "I want to raise a ticket as it is not of good quality as expected",
+        "I have a problem with my order",
+        "Raise a support ticket",
+        "My item arrived broken, please log a complaint",
+        "The delivery person was rude",
+        "I was charged twice for my order",
+    ],
+    "faq_llm": [
+        "What does NovaCart do?",
+        "What products do you sell?",
+        "What is your return policy?",
+        "How long does delivery take?",
+        "How does refund work?",
+        "Can you suggest me some products under electronics category?",
+        "How can we verify the authenticity of your products?",
+        "Tell me about your company's account and support",
+        "What is your companies vision and target",
+        "I want to reset my password",
+        "tell me about the payment methods",
+        "what kind of products do you have",
+        "Hi",
+        "Tell me a joke",
+    ],
+}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class CentroidIntentClassifier:
+    """
+    Nearest-centroid classifier: one mean (unit) embedding per label,
+    cosine similarity against all of them with a single matmul.
+    """
+
+    def __init__(self, embeddings=None):
+        self.embeddings = embeddings or get_embeddings()
+        self.labels = []
+        self.centroids = None
+
+    def fit(self, examples=LABELED_EXAMPLES):
+        labels, texts = [], []
+        for label, phrases in examples.items():
+            labels.extend([label] * len(phrases))
+            texts.extend(phrases)
+
+        vectors = _normalize(np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32))
+        label_array = np.asarray(labels)
+
+        self.labels = list(examples)
+        self.centroids = _normalize(
+            np.stack([vectors[label_array == label].mean(axis=0) for label in self.labels])
+        )
+        return self
+
+    def scores(self, text: str):
+        query = _normalize(np.asarray(self.embeddings.embed_query(text), dtype=np.float32))
+        return self.centroids @ query
+
+    def predict(self, text: str):
+        """
+        (label, similarity) if confident, else (None, similarity).
+        """
+        scores = self.scores(text)
+        order = np.argsort(scores)[::-1]
+        best, runner_up = scores[order[0]], scores[order[1]]
+
+        if best >= INTENT_MIN_SIMILARITY and best - runner_up >= INTENT_MIN_MARGIN:
+            return self.labels[order[0]], float(best)
+        return None, float(best)
+
+
+_classifier = None
+_classifier_failed = False
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier():
+    """
+    The fitted classifier, or None if loading failed (e.g. the embedding
+    model can't be downloaded offline). Loading is tried once per process.
+    """
+    global _classifier, _classifier_failed
+    if _classifier is None and not _classifier_failed:
+        with _classifier_lock:
+            if _classifier is None and not _classifier_failed:
+                try:
+                    _classifier = CentroidIntentClassifier().fit()
+                except Exception as exc:
+                    _classifier_failed = True
+                    print(f"⚠️ intent classifier disabled, using the LLM only: {exc}")
+    return _classifier
+
+
+def predict_intent(text: str):
+    """
+    (label, similarity); (None, 0.0) when the classifier is unavailable.
+    """
+    classifier = get_intent_classifier()
+    if classifier is None:
+        return None, 0.0
+    return classifier.predict(text)
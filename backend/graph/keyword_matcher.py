@@ -0,0 +1,70 @@
+import re
+from typing import Dict, List, Optional, Set
+
+_WORD = re.compile(r"\w+")
+
+
+class KeywordMatcher:
+    """
+    Precompiled multi-pattern matcher for the router's keyword lists.
+
+    Every phrase of every category is compiled into one word-level
+    lookup table (phrase -> categories). A message is tokenized once and
+    classified against all lists in a single pass over its words, with
+    whole-word semantics ("agent" no longer fires inside "management",
+    "sue" inside "issue").
+
+    Categories keep the order they were given in, so pass them in
+    routing priority order.
+    """
+
+    def __init__(self, rules: Dict[str, List[str]]):
+        self.categories = list(rules)
+
+        self._single = {}     # "agent"            -> {"escalation"}
+        self._multi = {}      # ("talk", "to", ..) -> {"escalation"}
+        self._starts = {}     # first word of a multi-word phrase -> lengths
+
+        for category, phrases in rules.items():
+            for phrase in phrases:
+                words = tuple(_WORD.findall(phrase.lower()))
+                if not words:
+                    continue
+                if len(words) == 1:
+                    self._single.setdefault(words[0], set()).add(category)
+                else:
+                    self._multi.setdefault(words, set()).add(category)
+                    self._starts.setdefault(words[0], set()).add(len(words))
+
+    def matches(self, text: str) -> Set[str]:
+        """
+        Every category that matched anywhere in the text.
+        """
+        words = _WORD.findall(text.lower())
+        hits = set()
+
+        single = self._single
+        for word in single.keys() & set(words):
+            hits |= single[word]
+
+        starts = self._starts
+        if starts:
+            for i, word in enumerate(words):
+                lengths = starts.get(word)
+                if lengths:
+                    for n in lengths:
+                        categories = self._multi.get(tuple(words[i:i + n]))
+                        if categories:
+                            hits |= categories
+
+        return hits
+
+    def first_category(self, text: str, categories: Optional[List[str]] = None) -> Optional[str]:
+        """
+        Highest-priority matching category (optionally limited to a subset).
+        """
+        hits = self.matches(text)
+        for category in categories or self.categories:
+            if category in hits:
+                return category
+        return None
@@ -1,39 +1,53 @@
 import re
+import asyncio
 from langchain_core.messages import AIMessage
-from langchain_groq import ChatGroq
 from backend.graph.state import get_last_human_message
-from dotenv import load_dotenv
-
-load_dotenv()
+from backend.graph.routing_rules import get_routing_rules
+from backend.graph.intent_classifier import INTENT_CLASSIFIER_ENABLED, predict_intent
+from backend.graph.intent_cache import get_intent_cache
+from backend.db import get_order
+from backend.llm import LLMUnavailable, ainvoke_llm
+from backend import offline
 
 ORDER_ID_REGEX = r"(ORD-[A-Za-z0-9]+)"
+PAGE_REGEX = r"\bpage\s*(\d+)"
 
-intent_llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0
-)
-
-# ----------------------------------
-# Human escalation trigger phrases
-# ----------------------------------
-ESCALATION_PHRASES = [
-    "human", "agent", "real person","talk to support", "frustrating" "not helpful", "frustrated",
-    "this is useless", "escalate", "talk to human", "speak to human", "real person", "customer service", "call center", "agent", "supervisor",
-    "manager", "human agent", "live agent", "representative", "Customer support", "Need help", 
-]
-
-COMPLAINT_KEYWORDS = [
-        "complaint", "complain", "worst", "terrible", "horrible",  "scam", "fraud", 
-        "cheated", "consumer forum", "legal", "lawyer", "court", "sue", "police", "cyber crime"
-    ]
+# routing_rules.json rule that switches track_agent to bulk mode
+TRACK_ALL_RULE = "track_all"
 
-URGENT_KEYWORDS = [
-        "urgent", "emergency", "immediately", "asap", "right now",
-        "critical", "very important", "need help now"
-    ]
+INTENT_LABELS = {"place_order", "track_order", "return_order", "raise_ticket", "faq_llm"}
 
 
-def llm_intent_classify(text: str) -> str:
+async def llm_intent_classify(text: str) -> str:
+    """
+    Cached (normalized text -> label) front for classify_intent().
+    """
+    intent_cache = get_intent_cache()
+
+    label = await intent_cache.aget(text)
+    if label:
+        return label
+
+    try:
+        label = await classify_intent(text)
+    except LLMUnavailable:
+        return offline.classify_intent(text)   # rule guess, not cached
+    if label in INTENT_LABELS:
+        await intent_cache.aput(text, label)
+    return label
+
+
+async def classify_intent(text: str) -> str:
+    # ---- local embedding classifier first (ms, no network) ----
+    if INTENT_CLASSIFIER_ENABLED:
+        try:
+            label, _ = await asyncio.to_thread(predict_intent, text)
+        except Exception:
+            label = None
+        if label:
+            return label
+
+    # ---- low confidence: ask the LLM ----
     prompt = f"""
 Classify the user's intent into ONE of the following:
 - place_order
@@ -47,13 +61,48 @@ User message:
 
 Respond with ONLY the intent label.
 """
-    return intent_llm.invoke(prompt).content.strip()
+    return (await ainvoke_llm(prompt, agent="intent_router")).strip()
+
+# ----------------------------------
+# Speculative order prefetch
+# ----------------------------------
+def start_order_lookup(order_id: str, user_id: str):
+    """
+    Start fetching the order right away; routing continues meanwhile.
+    """
+    return asyncio.create_task(asyncio.to_thread(get_order, order_id, user_id))
+
+
+async def finish_order_lookup(state, order_lookup) -> bool:
+    """
+    Await the prefetch and carry the row in state for the agents.
+    Returns False (after a "not found" reply) if the order doesn't
+    exist for this user, so no agent / LLM call is made for it.
+    """
+    if order_lookup is None:
+        return True
+
+    order_id = state["active_order_id"]
+    row = await order_lookup
+    state["prefetched_order"] = {"order_id": order_id, "row": row}
+
+    if row is None:
+        state["active_order_id"] = None
+        state["messages"].append(
+            AIMessage(
+                content=f"❌ I couldn’t find any order with ID **{order_id}** linked to your account."
+            )
+        )
+        state["next_node"] = "END"
+        return False
+    return True
+
 
 # ----------------------------------
 # Main Router: Intent Classification
 # ----------------------------------
 
-def intent_router(state):
+async def intent_router(state):
     """
     Router node:
     - decides next_node
@@ -64,6 +113,10 @@ def intent_router(state):
     lowered = user_text.lower()
     intent = None
 
+    # rule table snapshot for this request (hot-reloaded between requests),
+    # one matcher pass over every keyword list
+    escalation_rule, intent_rule = get_routing_rules().classify(user_text)
+
     # ----------------------------------
     # 🔒 ORDER FLOW LOCK
     # ----------------------------------
@@ -75,25 +128,31 @@ def intent_router(state):
     # =====================================================
     # 🚨 STEP 0: Explicit Human Escalation (User requested)
     # =====================================================
-    if any(p in lowered for p in ESCALATION_PHRASES):
-        state["escalation_reason"] = "User Requested Human"
-        state["next_node"] = "ticket_agent"
-        return state    
-    if any(p in lowered for p in URGENT_KEYWORDS):
-        state["escalation_reason"] = "Urgent User Request"
-        state["next_node"] = "ticket_agent"
-        return state
-    if any(p in lowered for p in COMPLAINT_KEYWORDS):
-        state["escalation_reason"] = "Detected Complaint / Legal Issues"
-        state["next_node"] = "ticket_agent"
+    if escalation_rule:
+        state["escalation_reason"] = escalation_rule["escalation_reason"]
+        state["next_node"] = escalation_rule["next_node"]
         return state
 
     # -----------------------------
     # STEP 1: Extract order ID
     # -----------------------------
     match = re.search(ORDER_ID_REGEX, user_text)
+
+    # -----------------------------
+    # Bulk tracking: "Track all my orders [page 2]"
+    # (no order ID needed, one DB query in track_agent)
+    # -----------------------------
+    if not match and intent_rule and intent_rule["name"] == TRACK_ALL_RULE:
+        page = re.search(PAGE_REGEX, lowered)
+        state["track_all_page"] = max(int(page.group(1)), 1) if page else 1
+        state["pending_intent"] = None
+        state["next_node"] = intent_rule["next_node"]
+        return state
+
+    order_lookup = None
     if match:
         state["active_order_id"] = match.group(1)
+        order_lookup = start_order_lookup(match.group(1), state["user_id"])
 
     # -----------------------------
     # STEP 2: Detect invalid-looking order ID
@@ -118,25 +177,15 @@ def intent_router(state):
     # -----------------------------
     # STEP 3: Detect intent (rule-based)
     # -----------------------------
-    if any(q in lowered for q in ["what", "who", "company", "policy"]):
-        intent = "faq_agent"
-
-    elif "track" in lowered or "status" in lowered:
-        intent = "track_agent"
-
-    elif "return" in lowered or "send back" in lowered:
-        intent = "return_agent"
-
-    elif any(k in lowered for k in ["ticket", "complaint", "not received", "issue", "problem"]):
-        intent = "ticket_agent"
-
-    elif any(k in lowered for k in ["place", "buy", "order"]):
-        intent = "order_agent"
+    if intent_rule:
+        intent = intent_rule["next_node"]
 
     # -----------------------------
     # CASE A: Pending intent + order ID
     # -----------------------------
     if state.get("pending_intent") and state.get("active_order_id"):
+        if not await finish_order_lookup(state, order_lookup):
+            return state   # pending intent kept: user can send the right ID
         state["next_node"] = state["pending_intent"]
         state["pending_intent"] = None
         return state
@@ -169,8 +218,10 @@ def intent_router(state):
 
     # -----------------------------
     # CASE B: Order ID but no intent
+    # (only for an ID given in THIS message; a restored one is context)
     # -----------------------------
-    if state.get("active_order_id") and intent is None and not state.get("pending_intent"):
+    if match and intent is None and not state.get("pending_intent"):
+        order_lookup.cancel()
         state["messages"].append(
             AIMessage(
                 content=(
@@ -189,6 +240,8 @@ def intent_router(state):
     # CASE A: Intent + order ID
     # -----------------------------
     if intent in ["track_agent", "return_agent", "ticket_agent"] and state.get("active_order_id"):
+        if not await finish_order_lookup(state, order_lookup):
+            return state
         state["next_node"] = intent
         return state
 
@@ -209,7 +262,10 @@ def intent_router(state):
     # -----------------------------
     # STEP 9: LLM fallback
     # -----------------------------
-    llm_intent = llm_intent_classify(user_text)
+    if not await finish_order_lookup(state, order_lookup):
+        return state
+
+    llm_intent = await llm_intent_classify(user_text)
     state["next_node"] = {
         "place_order": "order_agent",
         "track_order": "track_agent",
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import threading
+from backend.graph.keyword_matcher import KeywordMatcher
+
+# ----------------------------------
+# Data-driven routing rules
+# ----------------------------------
+# The rule table lives in routing_rules.json (or .yaml, if PyYAML is
+# installed). It is compiled once into a KeywordMatcher; when the file
+# changes, a new RoutingRules object is compiled and swapped in with a
+# single reference assignment. In-flight requests keep the object they
+# started with, so nothing is dropped and no worker restarts.
+ROUTING_RULES_PATH = os.getenv(
+    "ROUTING_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_rules.json"),
+)
+ROUTING_RULES_CHECK_INTERVAL = float(os.getenv("ROUTING_RULES_CHECK_INTERVAL", "2"))  # seconds
+
+ROUTABLE_NODES = {"faq_agent", "order_agent", "track_agent", "return_agent", "ticket_agent"}
+
+
+def _read_rules_file(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml   # optional, only needed for YAML rule files
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+class RoutingRules:
+    """
+    One immutable, compiled version of the rule table.
+    """
+
+    def __init__(self, rules, version: float = 0.0):
+        self.version = version
+        self.rules = list(rules)
+        self._validate()
+
+        self.by_name = {rule["name"]: rule for rule in self.rules}
+        self.escalation_rules = [r for r in self.rules if r.get("escalation_reason")]
+        self.intent_rules = [r for r in self.rules if not r.get("escalation_reason")]
+        self.matcher = KeywordMatcher({r["name"]: r["keywords"] for r in self.rules})
+
+    def _validate(self):
+        seen = set()
+        for rule in self.rules:
+            name = rule.get("name")
+            if not name or not name.isidentifier():
+                raise ValueError(f"routing rule needs an identifier name: {rule!r}")
+            if name in seen:
+                raise ValueError(f"duplicate routing rule: {name}")
+            if rule.get("next_node") not in ROUTABLE_NODES:
+                raise ValueError(f"rule {name}: unknown next_node {rule.get('next_node')!r}")
+            if not isinstance(rule.get("keywords"), list) or not rule["keywords"]:
+                raise ValueError(f"rule {name}: keywords must be a non-empty list")
+            seen.add(name)
+
+    @classmethod
+    def load(cls, path: str = ROUTING_RULES_PATH) -> "RoutingRules":
+        return cls(_read_rules_file(path)["rules"], version=os.stat(path).st_mtime)
+
+    def classify(self, text: str):
+        """
+        (escalation_rule, intent_rule) — highest-priority hit of each
+        kind, or None — from a single matcher pass.
+        """
+        hits = self.matcher.matches(text)
+        escalation = next((r for r in self.escalation_rules if r["name"] in hits), None)
+        intent = next((r for r in self.intent_rules if r["name"] in hits), None)
+        return escalation, intent
+
+
+class RoutingRuleStore:
+    """
+    Holds the current RoutingRules and hot-reloads them on file change.
+    A broken edit is reported and the previous rules stay active.
+    """
+
+    def __init__(self, path: str = ROUTING_RULES_PATH,
+                 check_interval: float = ROUTING_RULES_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._rules = RoutingRules.load(path)   # fail loudly at startup
+        self._next_check = time.monotonic() + check_interval
+        self._reload_lock = threading.Lock()
+        self._rejected_version = None
+
+    def get(self) -> RoutingRules:
+        if time.monotonic() >= self._next_check:
+            self._maybe_reload()
+        return self._rules
+
+    def _maybe_reload(self):
+        if not self._reload_lock.acquire(blocking=False):
+            return   # another request is already reloading
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                return
+            if mtime in (self._rules.version, self._rejected_version):
+                return
+            try:
+                self._rules = RoutingRules.load(self.path)
+                print(f"🔁 Routing rules reloaded from {self.path}")
+            except Exception as exc:
+                self._rejected_version = mtime
+                print(f"⚠️ Routing rules reload failed, keeping previous rules: {exc}")
+        finally:
+            self._reload_lock.release()
+
+
+_store = None
+
+
+def get_routing_rules() -> RoutingRules:
+    global _store
+    if _store is None:
+        _store = RoutingRuleStore()
+    return _store.get()
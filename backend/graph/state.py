@@ -16,11 +16,32 @@ class ConversationState(TypedDict):
     # ---- order-aware conversation support ----
     active_order_id: Optional[str]   # stores detected order ID across turns
     pending_intent: Optional[str]    # stores intent until order ID is provided
+    order_context: Optional[Dict[str, Any]]  # locks the flow to order_agent
 
     # ---- human escalation support ----
     escalation_reason: Optional[str]  # why conversation was escalated
+
+    # ---- routing ----
+    next_node: Optional[str]          # router decision (also streamed to clients)
+
+    # ---- order row fetched by the router (this turn only) ----
+    prefetched_order: Optional[Dict[str, Any]]   # {"order_id": ..., "row": dict | None}
+
+    # ---- "track all my orders" page requested this turn ----
+    track_all_page: Optional[int]
     
 
+def get_prefetched_order(state, order_id):
+    """
+    (True, row_or_None) if intent_router already looked up order_id
+    this turn, else (False, None) and the caller queries the DB.
+    """
+    prefetched = state.get("prefetched_order")
+    if prefetched and prefetched.get("order_id") == order_id:
+        return True, prefetched.get("row")
+    return False, None
+
+
 def get_last_human_message(messages):
     for msg in reversed(messages):
         if isinstance(msg, HumanMessage):
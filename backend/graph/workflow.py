@@ -6,17 +6,18 @@ from backend.agents.track_agent import track_agent
 from backend.agents.ticket_agent import ticket_agent
 from backend.agents.return_agent import return_agent
 from backend.rag.faq_agent import faq_llm
-from backend.memory import save_memory
+from backend.memory import get_memory_writer
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def persist_memory(state: ConversationState):
+async def persist_memory(state: ConversationState):
     """
     Persist only recent messages for conversation continuity.
+    Write-behind: queued here, flushed in batches off the request path.
     """
-    save_memory(state["session_id"], state["messages"][-2:])
+    await get_memory_writer().asubmit(state["session_id"], state["messages"][-2:])
     return state
 
 
@@ -0,0 +1,294 @@
+# backend/llm.py
+"""
+Central LLM provider.
+
+Every agent gets its chat model from here instead of building its own
+ChatGroq at import time:
+
+- one shared keep-alive HTTP pool (sync + async) for all clients
+- one deadline per call (LLM_TIMEOUT_SECONDS), retries included
+- only transient errors (timeouts, connection errors, 429, 5xx) are
+  retried, with full-jitter exponential backoff; a 4xx fails at once
+- a circuit breaker: after LLM_BREAKER_FAILURES consecutive transient failures
+  calls fail fast for LLM_BREAKER_RESET_SECONDS, then one probe call
+  is let through
+- identical deterministic prompts are answered from the response
+  cache (backend/llm_cache.py)
+- every call is recorded in the request's ledger (backend/llm_ledger.py),
+  which also enforces the per-request call / token budget
+- offline mode (backend/offline.py) refuses every call up front
+
+Callers use ainvoke_llm() and catch LLMUnavailable to fall back to their
+deterministic template instead of hanging on a slow provider.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+
+import httpx
+from groq import APIConnectionError, APIStatusError
+from langchain_groq import ChatGroq
+from backend.llm_cache import cache_enabled_for, cache_key, get_response_cache
+from backend.llm_ledger import current_llm_ledger
+from backend.offline import is_offline
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "0.25"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+
+
+class LLMUnavailable(Exception):
+    """
+    The LLM could not answer (breaker open, deadline, provider error).
+    """
+
+
+class LLMBudgetExceeded(LLMUnavailable):
+    """
+    The request already spent its LLM budget.
+    """
+
+
+class LLMRefused(LLMUnavailable):
+    """
+    No request was sent: circuit open or the LLM is not configured.
+    """
+
+
+class LLMOffline(LLMUnavailable):
+    """
+    Offline mode: no LLM calls for this process / request.
+    """
+
+
+# =====================================================================
+# Circuit breaker
+# =====================================================================
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True   # exactly one probe call
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_neutral(self):
+        """
+        Outcome says nothing about provider health (e.g. a 4xx): only
+        hands the half-open probe back.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+breaker = CircuitBreaker()
+
+
+# =====================================================================
+# Client registry (shared HTTP pool)
+# =====================================================================
+_clients = {}
+_clients_lock = threading.Lock()
+_http_client = None
+_http_async_client = None
+
+
+def _http_pools():
+    global _http_client, _http_async_client
+    if _http_client is None:
+        limits = httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS // 4,
+            keepalive_expiry=30,
+        )
+        timeout = httpx.Timeout(LLM_TIMEOUT_SECONDS)
+        _http_client = httpx.Client(limits=limits, timeout=timeout)
+        _http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+    return _http_client, _http_async_client
+
+
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = 0, json_mode: bool = False) -> ChatGroq:
+    """
+    Shared ChatGroq per (model, temperature, json_mode). Retries are done
+    by ainvoke_llm (with jitter), so the SDK's own retries are off.
+    json_mode: the provider only returns a valid JSON object.
+    """
+    key = (model, temperature, json_mode)
+    with _clients_lock:
+        if key not in _clients:
+            http_client, http_async_client = _http_pools()
+            _clients[key] = ChatGroq(
+                model=model,
+                temperature=temperature,
+                timeout=LLM_TIMEOUT_SECONDS,
+                max_retries=0,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                model_kwargs={"response_format": {"type": "json_object"}} if json_mode else {},
+            )
+        return _clients[key]
+
+
+# =====================================================================
+# Invocation
+# =====================================================================
+def is_transient(exc) -> bool:
+    """
+    Worth retrying (and a sign of provider trouble for the breaker):
+    timeouts, connection errors, 429 and 5xx. Bad keys, bad requests and
+    JSON-mode validation failures (4xx) are not.
+    """
+    if isinstance(exc, (asyncio.TimeoutError, APIConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def response_usage(response):
+    """
+    (prompt_tokens, completion_tokens); estimated if the provider
+    didn't report usage.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    return 0, len(response.content) // 4 + 1
+
+
+async def ainvoke_llm(prompt, *, agent: str, model: str = DEFAULT_MODEL,
+                      temperature: float = 0, timeout: float = None,
+                      cache: bool = None, json_mode: bool = False,
+                      stream: bool = True) -> str:
+    """
+    Invoke the LLM with deadline, jittered retries and circuit breaker.
+    Returns the response text; raises LLMUnavailable.
+
+    stream=False tags the call "nostream" so LangGraph's messages stream
+    never forwards its tokens (internal calls inside a reply node).
+
+    Deterministic (temperature=0) calls go through the response cache
+    unless the agent opted out; cache=True/False overrides per call.
+    """
+    if is_offline():
+        raise LLMOffline(f"{agent}: offline mode")
+
+    ledger = current_llm_ledger()
+    started = time.perf_counter()
+
+    if cache is None:
+        cache = cache_enabled_for(agent)
+    use_cache = cache and temperature == 0
+
+    if use_cache:
+        key = cache_key(f"{model}:json" if json_mode else model, prompt)
+        cached = await get_response_cache().aget(key, agent)
+        if cached is not None:
+            if ledger is not None:
+                ledger.record(agent, seconds=time.perf_counter() - started, cached=True)
+            return cached
+
+    if ledger is not None:
+        reason = ledger.over_budget()
+        if reason:
+            ledger.record(agent, denied=True)
+            raise LLMBudgetExceeded(f"{agent}: {reason}")
+
+    try:
+        text, (prompt_tokens, completion_tokens) = await _ainvoke_provider(
+            prompt, agent, model, temperature, timeout, json_mode, stream
+        )
+    except LLMRefused:
+        if ledger is not None:
+            ledger.record(agent, refused=True)   # never reached the provider
+        raise
+    except LLMUnavailable:
+        if ledger is not None:
+            ledger.record(agent, seconds=time.perf_counter() - started)
+        raise
+
+    if ledger is not None:
+        ledger.record(agent, prompt_tokens, completion_tokens, time.perf_counter() - started)
+
+    if use_cache and text:
+        await get_response_cache().aput(key, text, prompt_tokens + completion_tokens)
+    return text
+
+
+async def _ainvoke_provider(prompt, agent, model, temperature, timeout, json_mode, stream=True):
+    try:
+        llm = get_llm(model, temperature, json_mode)
+    except Exception as exc:   # e.g. GROQ_API_KEY missing: not the provider's fault
+        raise LLMRefused(f"{agent}: LLM not configured: {exc}") from exc
+
+    if not breaker.allow():
+        raise LLMRefused(f"{agent}: circuit open")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (timeout or LLM_TIMEOUT_SECONDS)   # covers all attempts
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            response = await asyncio.wait_for(
+                llm.ainvoke(prompt, config=None if stream else {"tags": ["nostream"]}),
+                max(deadline - loop.time(), 0),
+            )
+        except Exception as exc:
+            if not is_transient(exc):
+                breaker.record_neutral()   # our fault, not the provider's
+                raise LLMUnavailable(f"{agent}: {type(exc).__name__}: {exc}") from exc
+            breaker.record_failure()
+            # full jitter: sleep U(0, base * 2^attempt)
+            backoff = random.uniform(0, LLM_BACKOFF_SECONDS * 2 ** attempt)
+            if attempt == LLM_MAX_RETRIES or loop.time() + backoff >= deadline or not breaker.allow():
+                raise LLMUnavailable(f"{agent}: {type(exc).__name__}: {exc}") from exc
+            await asyncio.sleep(backoff)
+            continue
+
+        breaker.record_success()
+        return response.content, response_usage(response)
+
+    raise LLMUnavailable(f"{agent}: no attempts left")
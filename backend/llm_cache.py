@@ -0,0 +1,90 @@
+import os
+import hashlib
+
+from backend.tiered_cache import TieredCache
+
+# ----------------------------------
+# LLM response cache
+# ----------------------------------
+# All agents run at temperature=0, so (model, prompt) -> response is
+# deterministic. Memory tier: LRU with TTL. Disk tier (optional,
+# LLM_CACHE_DB): survives restarts, shared by workers on the same host
+# (see backend/tiered_cache.py).
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "")   # empty = memory only
+
+# Per-agent opt-out (comma separated ainvoke_llm agent names). The
+# summary prompt embeds the whole transcript and never repeats.
+LLM_CACHE_DISABLED_AGENTS = {
+    name.strip()
+    for name in os.getenv("LLM_CACHE_DISABLED_AGENTS", "context_summary").split(",")
+    if name.strip()
+}
+
+
+def prompt_text(prompt) -> str:
+    """
+    Stable text form of a prompt (str or list of messages).
+    """
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(f"{message.type}: {message.content}" for message in prompt)
+
+
+def cache_key(model: str, prompt) -> str:
+    return hashlib.sha256(f"{model}\0{prompt_text(prompt)}".encode("utf-8")).hexdigest()
+
+
+def cache_enabled_for(agent: str) -> bool:
+    return LLM_CACHE_ENABLED and agent not in LLM_CACHE_DISABLED_AGENTS
+
+
+class ResponseCache(TieredCache):
+    """
+    TieredCache + per-agent hit / saved-token accounting.
+    """
+
+    def __init__(self, max_size: int = LLM_CACHE_SIZE, ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+                 disk_path: str = LLM_CACHE_DB):
+        super().__init__("llm_responses", max_size, ttl_seconds, disk_path)
+        self.saved_tokens = 0
+        self.agent_hits = {}
+
+    def _hit(self, entry, agent: str):
+        if entry is None:
+            return None
+        with self._lock:
+            self.saved_tokens += entry[2] or 0
+            self.agent_hits[agent] = self.agent_hits.get(agent, 0) + 1
+        return entry[1]
+
+    def get(self, key: str, agent: str = ""):
+        return self._hit(self.lookup(key), agent)
+
+    def put(self, key: str, response: str, tokens: int = 0):
+        self.store(key, response, tokens)
+
+    async def aget(self, key: str, agent: str = ""):
+        return self._hit(await self.alookup(key), agent)
+
+    async def aput(self, key: str, response: str, tokens: int = 0):
+        await self.astore(key, response, tokens)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            stats["saved_tokens"] = self.saved_tokens
+            stats["hits_by_agent"] = dict(self.agent_hits)
+        return stats
+
+
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,115 @@
+import os
+from contextvars import ContextVar
+
+# ----------------------------------
+# Per-request LLM accounting
+# ----------------------------------
+# One ledger per chat turn, carried in a contextvar so every node of the
+# graph (router, agents, context summary) records into it without the
+# state having to thread it through. ainvoke_llm() refuses provider
+# calls once the budget is spent; callers then take their rule path.
+LLM_CALL_BUDGET = int(os.getenv("LLM_CALL_BUDGET", "3"))     # 0 = unlimited
+LLM_TOKEN_BUDGET = int(os.getenv("LLM_TOKEN_BUDGET", "0"))   # 0 = unlimited
+
+
+class LLMLedger:
+    def __init__(self, call_budget: int = LLM_CALL_BUDGET, token_budget: int = LLM_TOKEN_BUDGET):
+        self.call_budget = call_budget
+        self.token_budget = token_budget
+        self.nodes = {}   # agent -> counters
+
+    def _node(self, agent: str) -> dict:
+        return self.nodes.setdefault(agent, {
+            "calls": 0,
+            "cached": 0,
+            "denied": 0,
+            "refused": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "ms": 0.0,
+        })
+
+    def record(self, agent: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               seconds: float = 0.0, cached: bool = False, denied: bool = False,
+               refused: bool = False):
+        node = self._node(agent)
+        if denied:
+            node["denied"] += 1   # over budget: served by the rule path
+        elif refused:
+            node["refused"] += 1  # circuit open / not configured: nothing sent
+        elif cached:
+            node["cached"] += 1
+        else:
+            node["calls"] += 1
+            node["prompt_tokens"] += prompt_tokens
+            node["completion_tokens"] += completion_tokens
+        node["ms"] += seconds * 1000
+
+    def over_budget(self):
+        """
+        Reason string if no further provider call is allowed, else None.
+        """
+        totals = self.totals()
+        if self.call_budget and totals["calls"] >= self.call_budget:
+            return f"call budget of {self.call_budget} spent"
+        if self.token_budget and totals["tokens"] >= self.token_budget:
+            return f"token budget of {self.token_budget} spent"
+        return None
+
+    def totals(self) -> dict:
+        totals = {"calls": 0, "cached": 0, "denied": 0, "refused": 0,
+                  "prompt_tokens": 0, "completion_tokens": 0, "ms": 0.0}
+        for node in self.nodes.values():
+            for name in totals:
+                totals[name] += node[name]
+        totals["tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+        totals["ms"] = round(totals["ms"], 1)
+        return totals
+
+    def summary(self) -> dict:
+        return {
+            **self.totals(),
+            "nodes": {
+                agent: {**node, "ms": round(node["ms"], 1)}
+                for agent, node in self.nodes.items()
+            },
+        }
+
+    def headers(self) -> dict:
+        totals = self.totals()
+        return {
+            "X-LLM-Calls": str(totals["calls"]),
+            "X-LLM-Cached": str(totals["cached"]),
+            "X-LLM-Denied": str(totals["denied"]),
+            "X-LLM-Refused": str(totals["refused"]),
+            "X-LLM-Prompt-Tokens": str(totals["prompt_tokens"]),
+            "X-LLM-Completion-Tokens": str(totals["completion_tokens"]),
+            "X-LLM-Time-Ms": str(totals["ms"]),
+        }
+
+    def log(self, session_id: str):
+        totals = self.totals()
+        per_node = ", ".join(
+            f"{agent}={node['calls']}+{node['cached']}c" for agent, node in self.nodes.items()
+        )
+        print(
+            f"🧾 LLM {session_id}: {totals['calls']} calls, {totals['cached']} cached, "
+            f"{totals['denied']} over budget, {totals['refused']} refused, "
+            f"{totals['tokens']} tokens, {totals['ms']} ms ({per_node or 'none'})"
+        )
+
+
+_current_ledger: ContextVar = ContextVar("llm_ledger", default=None)
+
+
+def start_llm_ledger() -> LLMLedger:
+    """
+    Fresh ledger for the current request (task / async generator).
+    """
+    ledger = LLMLedger()
+    _current_ledger.set(ledger)
+    return ledger
+
+
+def current_llm_ledger():
+    return _current_ledger.get()
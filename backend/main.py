@@ -3,16 +3,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
-from fastapi import FastAPI
+import json
+import asyncio
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 import uuid
+from typing import Optional
 
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk
 
 from backend.graph.workflow import create_workflow
+from backend.graph.checkpoint import get_checkpointer
+from backend.graph.intent_cache import get_intent_cache
+from backend.llm_cache import get_response_cache
+from backend.llm_ledger import start_llm_ledger
+from backend.offline import set_request_offline
 from backend.db import init_db
-from backend.memory import init_memory_db, save_memory
+from backend.memory import init_memory_db, get_memory_writer
+from backend.retention import RetentionJob, register_session
 from backend.auth.auth_routes import router as auth_router
 
 
@@ -26,7 +36,25 @@ app.include_router(auth_router)
 init_db()
 init_memory_db()
 
+memory_writer = get_memory_writer()
+memory_writer.start()
+
+retention_job = RetentionJob()
+retention_job.start()
+
 graph = create_workflow()
+checkpointer = get_checkpointer()
+
+# Nodes whose LLM output IS the user-facing reply, so their tokens
+# can be forwarded as they arrive. Extraction prompts (JSON) are not;
+# internal calls inside these nodes (context summary) pass stream=False.
+TOKEN_STREAM_NODES = {"faq_llm"}
+
+@app.on_event("shutdown")
+def flush_memory_on_shutdown():
+    retention_job.stop()
+    memory_writer.stop()
+
 
 # ----------------------------------
 # Models
@@ -48,11 +76,22 @@ def health():
     return {"status": "ok"}
 
 
+# ----------------------------------
+# Metrics
+# ----------------------------------
+@app.get("/metrics")
+def metrics():
+    return {
+        "intent_cache": get_intent_cache().stats(),
+        "llm_cache": get_response_cache().stats(),
+    }
+
+
 # ----------------------------------
 # Start Chat Session
 # ----------------------------------
 @app.post("/chat/session/start")
-def start_chat_session(user_id: str):
+async def start_chat_session(user_id: str):
     """
     user_id comes from frontend AFTER login
     """
@@ -60,8 +99,8 @@ def start_chat_session(user_id: str):
     session_id = f"sess_{uuid.uuid4().hex[:8]}"
 
     
-    # initialize memory for this conversation
-    save_memory(session_id, [])
+    # register the session (TTL clock for retention); no memory rows yet
+    await asyncio.to_thread(register_session, session_id, user_id)
 
     return {"session_id": session_id}
 
@@ -70,28 +109,180 @@ def start_chat_session(user_id: str):
 # Chat
 # ----------------------------------
 @app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest, user_id: str, session_id: str        ):
+async def chat(req: ChatRequest, user_id: str, session_id: str, response: Response,
+               offline: Optional[bool] = None):
     """
     user_id is provided implicitly by frontend (stored after login)
     session_id is resolved automatically
+
+    Fully async: the graph awaits the LLM / DB I/O, so one worker
+    can hold many in-flight conversations.
+
+    ?offline=1 runs the turn without any LLM call (backend/offline.py).
     """
 
+    ledger = start_llm_ledger()
+    set_request_offline(offline)
+
+    state = await build_initial_state(req.message, user_id, session_id)
+
+    result = await graph.ainvoke(state)
+
+    await checkpointer.asave(session_id, result)
+
+    response.headers.update(ledger.headers())
+    ledger.log(session_id)
+
+    reply = result["messages"][-1].content if result.get("messages") else ""
+
+    return ChatResponse(
+        response=reply,
+        session_id=session_id
+    )
+
+
+# ----------------------------------
+# Streaming helpers
+# ----------------------------------
+async def build_initial_state(message: str, user_id: str, session_id: str):
+    """
+    Fresh turn state + the session slots restored by the checkpointer
+    (active_order_id, pending_intent, order_context).
+    """
     state = {
-        "messages": [HumanMessage(content=req.message)],
+        "messages": [HumanMessage(content=message)],
         "intent": "",
         "user_id": user_id,
         "session_id": session_id
     }
+    state.update(await checkpointer.aload(session_id))
+    return state
 
-    result = graph.invoke(state)
 
-    reply = result["messages"][-1].content if result.get("messages") else ""
+async def stream_chat_events(message: str, user_id: str, session_id: str,
+                             offline: Optional[bool] = None):
+    """
+    Run one turn through the graph and yield events as they happen:
+    - route   : router decision (first byte, before any agent LLM call)
+    - token   : LLM tokens from reply-producing nodes
+    - message : final reply (always sent, also for template replies),
+                with this turn's LLM totals (headers are gone by then)
+    """
+    ledger = start_llm_ledger()
+    set_request_offline(offline)
+    state = await build_initial_state(message, user_id, session_id)
+    reply = ""
+    final_state = state
+
+    async for mode, chunk in graph.astream(
+        state, stream_mode=["updates", "messages", "values"]
+    ):
+        if mode == "values":
+            final_state = chunk
+            continue
+
+        if mode == "messages":
+            token, metadata = chunk
+            # only streamed chunks: the node's final AIMessage is also
+            # emitted here and would repeat the whole answer
+            if (
+                isinstance(token, AIMessageChunk)
+                and metadata.get("langgraph_node") in TOKEN_STREAM_NODES
+                and token.content
+            ):
+                yield {
+                    "event": "token",
+                    "data": {"node": metadata["langgraph_node"], "content": token.content},
+                }
+            continue
+
+        for node, update in chunk.items():
+            if not update:
+                continue
+            if node == "intent_router":
+                yield {
+                    "event": "route",
+                    "data": {"next_node": update.get("next_node", "END")},
+                }
+            messages = update.get("messages") or []
+            if node != "persist_memory" and messages and isinstance(messages[-1], AIMessage):
+                reply = messages[-1].content
+
+    await checkpointer.asave(session_id, final_state)
+    ledger.log(session_id)
+
+    yield {
+        "event": "message",
+        "data": {"response": reply, "session_id": session_id, "llm": ledger.summary()},
+    }
 
-    return ChatResponse(
-        response=reply,
-        session_id=session_id
+
+def to_sse(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+# ----------------------------------
+# Chat (Server-Sent Events)
+# ----------------------------------
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, user_id: str, session_id: str,
+                      offline: Optional[bool] = None):
+    """
+    Same contract as /chat, but streamed as text/event-stream.
+    """
+
+    async def event_source():
+        async for event in stream_chat_events(req.message, user_id, session_id, offline):
+            yield to_sse(event)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
+
+# ----------------------------------
+# Chat (WebSocket)
+# ----------------------------------
+@app.websocket("/chat/ws")
+async def chat_ws(websocket: WebSocket, user_id: str, session_id: str,
+                  offline: Optional[bool] = None):
+    """
+    One socket per session; every {"message": "..."} frame is one turn.
+    Events are sent back as {"event": ..., "data": ...} JSON frames; a bad
+    frame or a failed turn gets an "error" event and the socket stays open.
+    """
+    await websocket.accept()
+
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                payload = json.loads(raw)
+            except (TypeError, ValueError):
+                payload = None
+            if not isinstance(payload, dict) or not isinstance(payload.get("message", ""), str):
+                await websocket.send_json(ws_error('Expected a JSON object: {"message": "..."}'))
+                continue
+
+            try:
+                async for event in stream_chat_events(
+                    payload.get("message", ""), user_id, session_id, offline
+                ):
+                    await websocket.send_json(event)
+            except WebSocketDisconnect:
+                raise
+            except Exception as exc:
+                print(f"⚠️ WebSocket turn failed (session {session_id}): {exc}")
+                await websocket.send_json(ws_error("Something went wrong, please try again."))
+    except WebSocketDisconnect:
+        return
+
+
+def ws_error(detail: str) -> dict:
+    return {"event": "error", "data": {"detail": detail}}
+
 #-------2 main.py (FastAPI) -------
 # from dotenv import load_dotenv
 # load_dotenv()
@@ -1,59 +1,407 @@
 # memory.py
-import sqlite3
+import os
+import queue
+import atexit
+import asyncio
+import threading
+from collections import defaultdict
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from backend.db import db_connection
 
-MEMORY_DB = "memory.db"
+PROJECT_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..")
+)
 
-def init_memory_db():
-    conn = sqlite3.connect(MEMORY_DB)
-    cursor = conn.cursor()
+# Absolute (was CWD-relative); override with MEMORY_DB_PATH
+MEMORY_DB = os.getenv("MEMORY_DB_PATH", os.path.join(PROJECT_ROOT, "memory.db"))
 
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS conversation_memory (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id TEXT,
-        role TEXT,
-        content TEXT,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
+INSERT_MEMORY_SQL = (
+    "INSERT INTO conversation_memory (session_id, role, content) VALUES (?, ?, ?)"
+)
+
+MEMORY_QUEUE_SIZE = int(os.getenv("MEMORY_QUEUE_SIZE", "10000"))
+MEMORY_FLUSH_INTERVAL = float(os.getenv("MEMORY_FLUSH_INTERVAL", "0.5"))   # seconds
+MEMORY_FLUSH_BATCH = 1000   # queue items per transaction
+MEMORY_FLUSH_RETRIES = 3    # attempts per batch before its rows are dropped
+
+def init_memory_db(db_path: str = MEMORY_DB):
+    with db_connection(db_path) as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            role TEXT,
+            content TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
 
-    conn.commit()
-    conn.close()
+        # load_memory: WHERE session_id = ? ORDER BY id DESC LIMIT ?
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_memory_session_id
+        ON conversation_memory (session_id, id)
+        """)
 
-def save_memory(session_id: str, messages):
-    conn = sqlite3.connect(MEMORY_DB)
-    cursor = conn.cursor()
+        # session registry: per-session TTL + last activity (retention)
+        has_registry = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversation_sessions'"
+        ).fetchone()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id TEXT,
+            ttl_days INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_active DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_last_active
+        ON conversation_sessions (last_active)
+        """)
+        if not has_registry:
+            # one-time: register sessions that predate the registry
+            conn.execute("""
+            INSERT OR IGNORE INTO conversation_sessions (session_id, created_at, last_active)
+            SELECT session_id, MIN(timestamp), MAX(timestamp)
+            FROM conversation_memory
+            GROUP BY session_id
+            """)
+
+        # rolling summary of turns that fell out of the context window
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_summaries (
+            session_id TEXT PRIMARY KEY,
+            summary TEXT,
+            summarized_upto INTEGER DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
 
+        # cross-process lease: one compact() at a time across workers
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS retention_lease (
+            name TEXT PRIMARY KEY,
+            owner TEXT,
+            expires_at REAL
+        )
+        """)
+
+def to_memory_rows(session_id: str, messages):
+    rows = []
     for msg in messages:
         role = "human" if isinstance(msg, HumanMessage) else "ai"
-        cursor.execute(
-            "INSERT INTO conversation_memory (session_id, role, content) VALUES (?, ?, ?)",
-            (session_id, role, msg.content),
-        )
+        rows.append((session_id, role, msg.content))
+    return rows
+
+def touch_sessions(conn, session_ids):
+    # upsert: sessions that skipped /chat/session/start (WebSocket
+    # clients, ids reused after compaction) get a registry row too,
+    # otherwise retention would never archive them
+    conn.executemany(
+        """
+        INSERT INTO conversation_sessions (session_id) VALUES (?)
+        ON CONFLICT(session_id) DO UPDATE SET last_active = CURRENT_TIMESTAMP
+        """,
+        [(session_id,) for session_id in session_ids]
+    )
+
+def save_memory(session_id: str, messages, db_path: str = MEMORY_DB):
+    rows = to_memory_rows(session_id, messages)
+    if not rows:
+        return
 
-    conn.commit()
-    conn.close()
+    with db_connection(db_path) as conn:
+        conn.executemany(INSERT_MEMORY_SQL, rows)
+        touch_sessions(conn, [session_id])
 
-def load_memory(session_id: str, limit: int = 6):
-    conn = sqlite3.connect(MEMORY_DB)
-    cursor = conn.cursor()
+def _load_rows(session_id: str, limit: int, db_path: str):
+    with db_connection(db_path) as conn:
+        rows = conn.execute("""
+            SELECT role, content FROM conversation_memory
+            WHERE session_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+        """, (session_id, limit)).fetchall()
+    return list(reversed(rows))
 
-    cursor.execute("""
-        SELECT role, content FROM conversation_memory
-        WHERE session_id = ?
-        ORDER BY id DESC
-        LIMIT ?
-    """, (session_id, limit))
+def _load_rows_since(session_id: str, after_id: int, limit: int, db_path: str):
+    with db_connection(db_path) as conn:
+        rows = conn.execute("""
+            SELECT id, role, content FROM conversation_memory
+            WHERE session_id = ? AND id > ?
+            ORDER BY id DESC
+            LIMIT ?
+        """, (session_id, after_id, limit)).fetchall()
+    return list(reversed(rows))
 
-    rows = cursor.fetchall()
-    conn.close()
+def _active_writer(db_path: str):
+    return _writer if _writer is not None and _writer.db_path == db_path else None
+
+def load_memory(session_id: str, limit: int = 6, db_path: str = MEMORY_DB):
+    writer = _active_writer(db_path)
+
+    if writer is None:
+        rows = _load_rows(session_id, limit, db_path)
+    else:
+        rows, pending = writer.read_your_writes(
+            session_id, lambda: _load_rows(session_id, limit, db_path)
+        )
+        rows = (rows + pending)[-limit:]
 
     messages = []
-    for role, content in reversed(rows):
+    for role, content in rows:
         if role == "human":
             messages.append(HumanMessage(content=content))
         else:
             messages.append(AIMessage(content=content))
 
     return messages
+
+
+# =====================================================================
+# Write-behind buffer
+# =====================================================================
+class MemoryWriter:
+    """
+    Moves memory writes off the request path.
+
+    - submit() only enqueues (bounded queue)
+    - a background thread flushes many sessions per single transaction
+      every MEMORY_FLUSH_INTERVAL seconds
+    - stop() drains everything (shutdown / atexit)
+    - load_memory() merges not-yet-flushed rows (read-your-writes)
+    """
+
+    def __init__(
+        self,
+        db_path: str = MEMORY_DB,
+        max_queue: int = MEMORY_QUEUE_SIZE,
+        flush_interval: float = MEMORY_FLUSH_INTERVAL,
+    ):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = defaultdict(list)   # session_id -> unflushed (role, content)
+        self._lock = threading.Lock()         # queue + pending bookkeeping (never held over I/O)
+        self._commit_lock = threading.Lock()  # commit vs. read_your_writes (rows never seen twice)
+        self._flush_lock = threading.Lock()   # one flusher at a time (keeps order)
+        self._failed = None                   # batch to retry before anything newer
+        self._failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="memory-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    # -----------------------------
+    # Producer side
+    # -----------------------------
+    def submit(self, session_id: str, messages):
+        rows = to_memory_rows(session_id, messages)
+        if not rows:
+            return
+
+        while True:
+            with self._lock:
+                try:
+                    self._queue.put_nowait(rows)
+                except queue.Full:
+                    pass
+                else:
+                    self._pending[session_id].extend(
+                        (role, content) for _, role, content in rows
+                    )
+                    return
+
+            # backpressure: writer is behind, flush a batch inline
+            self.flush(max_batches=1)
+
+    async def asubmit(self, session_id: str, messages):
+        # put_nowait never blocks; only the queue-full fallback touches disk
+        if self._queue.full():
+            await asyncio.to_thread(self.submit, session_id, messages)
+        else:
+            self.submit(session_id, messages)
+
+    # -----------------------------
+    # Consumer side
+    # -----------------------------
+    def _drain(self, first=None):
+        batch = [] if first is None else [first]
+        while len(batch) < MEMORY_FLUSH_BATCH:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _counts(batch):
+        counts = defaultdict(int)
+        for item in batch:
+            for session_id, _, _ in item:
+                counts[session_id] += 1
+        return counts
+
+    def _forget(self, counts):
+        # rows leave _pending oldest first: batches are flushed in order
+        with self._lock:
+            for session_id, count in counts.items():
+                del self._pending[session_id][:count]
+                if not self._pending[session_id]:
+                    del self._pending[session_id]
+
+    def _write(self, batch):
+        if not batch:
+            return
+        rows = [row for item in batch for row in item]
+        counts = self._counts(batch)
+
+        # inserts run unlocked (uncommitted rows are invisible in WAL);
+        # only the commit + pending cleanup are atomic w.r.t. readers,
+        # and submit() never waits on either
+        with db_connection(self.db_path) as conn:
+            conn.executemany(INSERT_MEMORY_SQL, rows)
+            touch_sessions(conn, counts)
+            with self._commit_lock:
+                conn.commit()
+                self._forget(counts)
+
+    def _flush_batch(self, batch) -> bool:
+        """
+        Write one batch. A failed batch is retried alone, before newer
+        ones, up to MEMORY_FLUSH_RETRIES times; then its rows are
+        dropped from _pending so reads stop returning them.
+        """
+        try:
+            self._write(batch)
+        except Exception as exc:
+            self._failures += 1
+            if self._failures < MEMORY_FLUSH_RETRIES:
+                self._failed = batch
+                print(f"⚠️ memory flush failed (attempt {self._failures}), retrying: {exc}")
+            else:
+                self._forget(self._counts(batch))
+                self._failed, self._failures = None, 0
+                rows = sum(len(item) for item in batch)
+                print(f"⚠️ memory flush failed {MEMORY_FLUSH_RETRIES} times, dropped {rows} rows: {exc}")
+            return False
+
+        self._failed, self._failures = None, 0
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._failed is not None:
+                # back off, then retry the failed batch first
+                self._stop.wait(self.flush_interval)
+                with self._flush_lock:
+                    if self._failed is not None:
+                        self._flush_batch(self._failed)
+                continue
+
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # let a few more turns accumulate into the same transaction
+            self._stop.wait(self.flush_interval)
+            with self._flush_lock:
+                self._flush_batch(self._drain(first))
+
+    def flush(self, max_batches: int = None):
+        with self._flush_lock:
+            done = 0
+            while (
+                (self._failed is not None or not self._queue.empty())
+                and (max_batches is None or done < max_batches)
+            ):
+                batch = self._failed if self._failed is not None else self._drain()
+                self._flush_batch(batch)
+                done += 1
+
+    # -----------------------------
+    # Read-your-writes
+    # -----------------------------
+    def read_your_writes(self, session_id: str, load_rows):
+        """
+        (load_rows(), unflushed (role, content) rows for this session).
+        """
+        with self._lock:
+            has_pending = session_id in self._pending
+        if not has_pending:
+            return load_rows(), []
+
+        # no commit between the DB read and the pending snapshot, so a
+        # row shows up exactly once
+        with self._commit_lock:
+            rows = load_rows()
+            with self._lock:
+                pending = list(self._pending.get(session_id, ()))
+        return rows, pending
+
+
+_writer = None
+
+
+def get_memory_writer() -> MemoryWriter:
+    global _writer
+    if _writer is None:
+        _writer = MemoryWriter()
+    return _writer
+
+
+# =====================================================================
+# Context-window helpers (see backend/context.py)
+# =====================================================================
+def load_turns_since(session_id: str, after_id: int, limit: int, db_path: str = MEMORY_DB):
+    """
+    Up to `limit` newest (id, role, content) rows with id > after_id,
+    oldest first. Unflushed rows come last with id=None.
+    """
+    writer = _active_writer(db_path)
+    load = lambda: _load_rows_since(session_id, after_id, limit, db_path)
+
+    if writer is None:
+        return load()
+
+    rows, pending = writer.read_your_writes(session_id, load)
+    return (rows + [(None, role, content) for role, content in pending])[-limit:]
+
+def load_summary(session_id: str, db_path: str = MEMORY_DB):
+    with db_connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT summary, summarized_upto FROM conversation_summaries WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+    return row if row else ("", 0)
+
+def save_summary(session_id: str, summary: str, summarized_upto: int, db_path: str = MEMORY_DB):
+    with db_connection(db_path) as conn:
+        conn.execute("""
+            INSERT INTO conversation_summaries (session_id, summary, summarized_upto)
+            VALUES (?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                summary = excluded.summary,
+                summarized_upto = excluded.summarized_upto,
+                updated_at = CURRENT_TIMESTAMP
+        """, (session_id, summary, summarized_upto))
@@ -0,0 +1,257 @@
+# backend/migrations.py
+"""
+Versioned schema migrations for orders.db.
+
+- schema_version holds one row per applied migration
+- fast path: ONE "SELECT MAX(version)" and return
+- slow path: all pending migrations under one BEGIN EXCLUSIVE transaction,
+  re-checking the version after the lock so concurrent workers apply
+  each migration exactly once
+
+Run before starting workers:
+    python -m backend.migrations            # apply pending
+    python -m backend.migrations --status   # show current / latest
+"""
+import argparse
+import sqlite3
+import sys
+
+from backend.db import DB_NAME, DB_BUSY_TIMEOUT_MS
+
+
+# -------------------------------------------------
+# Migration steps (append only — never edit a released one)
+# -------------------------------------------------
+# Each step carries its own SQL: a released step must not change when a
+# shared constant does. New indexes / triggers go in a new migration.
+def _create_core_tables(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        order_id TEXT UNIQUE,
+        product_id TEXT,
+        product_name TEXT,
+        status TEXT,
+        return_reason TEXT,
+        return_date TIMESTAMP,
+        order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS support_tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_num TEXT,
+        user_id TEXT,
+        order_id TEXT,
+        issue TEXT,
+        status TEXT,
+        ticket_created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS returns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        order_id TEXT,
+        reason TEXT,
+        status TEXT,
+        return_created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        username TEXT UNIQUE,
+        password TEXT
+    )
+    """)
+
+
+def _columns(conn, table: str):
+    return {col[1] for col in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_orders_quantity(conn):
+    # DBs bootstrapped by the old init_db() may already have it
+    if "quantity" not in _columns(conn, "orders"):
+        conn.execute("ALTER TABLE orders ADD COLUMN quantity INTEGER DEFAULT 1")
+
+
+def _add_orders_payment_mode(conn):
+    if "payment_mode" not in _columns(conn, "orders"):
+        conn.execute("ALTER TABLE orders ADD COLUMN payment_mode TEXT DEFAULT 'COD'")
+
+
+def _create_indexes(conn):
+    # track_agent.get_order_status / return_agent.validate_order
+    # (needed on DBs created before order_id became UNIQUE)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_order_user ON orders (order_id, user_id)")
+    # per-user order listing (newest first)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_user_date ON orders (user_id, order_date)")
+    # per-user ticket / return listings (newest first)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_user_date ON support_tickets (user_id, ticket_created_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_order ON support_tickets (order_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_returns_user_date ON returns (user_id, return_created_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_returns_order ON returns (order_id)")
+
+
+def _create_products_catalog(conn):
+    # product_id is the SKU; orders.product_id references it
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        category TEXT,
+        price REAL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products (name COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_product ON orders (product_id)")
+
+    # external-content FTS5 index over products, kept in sync by triggers
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, category,
+        content='products', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, category) VALUES (new.id, new.name, new.category);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category)
+        VALUES ('delete', old.id, old.name, old.category);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category)
+        VALUES ('delete', old.id, old.name, old.category);
+        INSERT INTO products_fts (rowid, name, category) VALUES (new.id, new.name, new.category);
+    END
+    """)
+
+
+def _create_order_items(conn):
+    # line items of an order; orders stays the header (status, returns,
+    # tickets) with product_name / quantity summarising the lines
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS order_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id TEXT NOT NULL,
+        line_no INTEGER NOT NULL,
+        product_id TEXT,
+        product_name TEXT,
+        quantity INTEGER DEFAULT 1,
+        UNIQUE (order_id, line_no)
+    )
+    """)
+    # existing single-product orders become one line each
+    conn.execute("""
+    INSERT OR IGNORE INTO order_items (order_id, line_no, product_id, product_name, quantity)
+    SELECT order_id, 1, product_id, product_name, COALESCE(quantity, 1)
+    FROM orders WHERE order_id IS NOT NULL
+    """)
+
+
+MIGRATIONS = [
+    (1, "core tables", _create_core_tables),
+    (2, "orders.quantity", _add_orders_quantity),
+    (3, "orders.payment_mode", _add_orders_payment_mode),
+    (4, "secondary indexes", _create_indexes),
+    (5, "products catalog + FTS5 index", _create_products_catalog),
+    (6, "order_items", _create_order_items),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+def current_version(conn) -> int:
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0   # never migrated
+    return row[0] or 0
+
+
+def migrate(db_path: str = DB_NAME) -> int:
+    """
+    Bring db_path up to LATEST_VERSION. Returns the number of
+    migrations applied (0 on the fast path).
+    """
+    conn = sqlite3.connect(
+        db_path, timeout=DB_BUSY_TIMEOUT_MS / 1000, isolation_level=None
+    )
+    try:
+        # -----------------------------
+        # Fast path: already current
+        # -----------------------------
+        if current_version(conn) >= LATEST_VERSION:
+            return 0
+
+        # -----------------------------
+        # Slow path: one exclusive transaction
+        # -----------------------------
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN EXCLUSIVE")
+        try:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+
+            # another worker may have migrated while we waited
+            version = current_version(conn)
+            pending = [m for m in MIGRATIONS if m[0] > version]
+
+            for number, name, step in pending:
+                step(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                    (number, name)
+                )
+
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return len(pending)
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply NovaCart schema migrations")
+    parser.add_argument("--db", default=DB_NAME, help="SQLite file (default: backend/orders.db)")
+    parser.add_argument("--status", action="store_true", help="only print the schema version")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        conn = sqlite3.connect(args.db)
+        print(f"schema version {current_version(conn)} (latest {LATEST_VERSION})")
+        conn.close()
+        return 0
+
+    applied = migrate(args.db)
+    print(f"✅ Applied {applied} migration(s); schema at version {LATEST_VERSION}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# offline.py
+"""
+Deterministic "no-LLM" implementations of every LLM touch point.
+
+They serve two cases:
+- offline mode: LLM_OFFLINE=1 for the whole process, or ?offline=1 on a
+  chat request; ainvoke_llm() then refuses every call (LLMOffline), so
+  the graph runs without GROQ_API_KEY / network (CI, load tests)
+- degraded mode: the LLM is unavailable (breaker open, timeout, budget)
+
+Callers catch LLMUnavailable and use the function below instead of the
+LLM answer, so both cases take exactly the same path.
+"""
+import os
+import re
+from contextvars import ContextVar
+
+from backend.graph.keyword_matcher import KeywordMatcher
+from backend.agents.order_parser import parse_order_items
+
+LLM_OFFLINE = os.getenv("LLM_OFFLINE", "0") == "1"
+
+_request_offline: ContextVar = ContextVar("llm_offline", default=None)
+
+
+def set_request_offline(offline):
+    """
+    Per-request override (None = follow LLM_OFFLINE).
+    """
+    _request_offline.set(offline)
+
+
+def is_offline() -> bool:
+    offline = _request_offline.get()
+    return LLM_OFFLINE if offline is None else offline
+
+
+# -----------------------------
+# Intent (router fallback)
+# -----------------------------
+# Broader than routing_rules.json: only consulted for messages the rule
+# table and the local classifier could not place.
+OFFLINE_INTENT_KEYWORDS = {
+    "raise_ticket": [
+        "ticket", "broken", "damaged", "defective", "charged twice", "rude",
+        "problem", "issue", "not working", "missing",
+    ],
+    "return_order": [
+        "return", "refund my", "send back", "send it back", "wrong item", "wrong size", "exchange",
+    ],
+    "track_order": [
+        "track", "where is", "arrive", "arrived", "delivered", "delivery status",
+        "shipped", "package", "status",
+    ],
+    "place_order": [
+        "order", "buy", "purchase", "cart", "place", "want to get",
+    ],
+}
+
+_intent_matcher = KeywordMatcher(OFFLINE_INTENT_KEYWORDS)
+
+
+def classify_intent(text: str) -> str:
+    return _intent_matcher.first_category(text) or "faq_llm"
+
+
+# -----------------------------
+# Order extraction (order_agent)
+# -----------------------------
+def extract_order(text: str) -> list:
+    """
+    "Order 2 headphones and a charger" ->
+    [{"product": "headphones", "quantity": 2}, {"product": "charger", "quantity": 1}]
+    """
+    return parse_order_items(text) or []
+
+
+# -----------------------------
+# Ticket / return extraction
+# -----------------------------
+_ORDER_ID = re.compile(r"\bORD-[A-Za-z0-9]+\b", re.IGNORECASE)
+_REASON = re.compile(r"\b(?:because|as|since|due\s+to|with|regarding|about)\b\s*(?:of\s+)?(.+)$",
+                     re.IGNORECASE)
+_TICKET_PHRASE = re.compile(
+    r"^(?:i\s+want\s+to\s+|please\s+)?(?:raise|create|open|log)\s+(?:a\s+)?(?:support\s+)?"
+    r"(?:ticket|complaint)(?:\s+for)?(?:\s+(?:my\s+)?order)?\s*",
+    re.IGNORECASE,
+)
+
+
+def _reason_clause(text: str):
+    match = _REASON.search(_ORDER_ID.sub(" ", text))
+    if not match:
+        return None
+    reason = match.group(1).strip(" .!?,")
+    return reason[0].upper() + reason[1:] if reason else None
+
+
+def extract_issue(text: str):
+    """
+    Issue for ticket_agent: the "because / with ..." clause, else the
+    message minus the "raise a ticket for ORD-X" boilerplate.
+    """
+    issue = _reason_clause(text)
+    if not issue:
+        issue = _TICKET_PHRASE.sub("", _ORDER_ID.sub(" ", text).strip()).strip(" .!?,")
+    return issue if len(issue or "") >= 5 else None
+
+
+def extract_return_reason(text: str) -> str:
+    return _reason_clause(text) or "Customer requested return"
+
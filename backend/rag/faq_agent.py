@@ -2,7 +2,6 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_groq import ChatGroq
 from langchain_core.messages import (
     SystemMessage,
     HumanMessage,
@@ -11,19 +10,29 @@ from langchain_core.messages import (
 )
 from backend.rag.tools import company_info_tool
 from backend.graph.state import get_last_human_message
+from backend.context import build_context
+from backend.llm import LLMUnavailable, ainvoke_llm
 
+FAQ_FALLBACK_CHARS = 400
 
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0
-)
+
+def extractive_answer(tool_result: str) -> str:
+    """
+    LLM-free answer: the top of the retrieved passage, cut at a sentence.
+    """
+    text = " ".join(tool_result.split())
+    if len(text) <= FAQ_FALLBACK_CHARS:
+        return text
+    cut = text[:FAQ_FALLBACK_CHARS]
+    end = cut.rfind(". ")
+    return cut[:end + 1] if end > 0 else cut + "…"
 
 
-def faq_llm(state):
+async def faq_llm(state):
     user_question = get_last_human_message(state["messages"])
 
     # ---- Step 1: Retrieve from vector DB ----
-    tool_result = company_info_tool.invoke(user_question)
+    tool_result = await company_info_tool.ainvoke(user_question)
 
     if not tool_result.strip():
         state["messages"].append(
@@ -31,7 +40,10 @@ def faq_llm(state):
         )
         return state
 
-    # ---- Step 2: FORCE summarization ----
+    # ---- Step 2: Bounded conversation context (summary + recent turns) ----
+    history = await build_context(state["session_id"])
+
+    # ---- Step 3: FORCE summarization ----
     messages = [
         SystemMessage(
             content=(
@@ -52,6 +64,7 @@ def faq_llm(state):
                 "- give a structure answer."
             )
         ),
+        *history,
         HumanMessage(
             content=f"""
             User question:
@@ -66,10 +79,13 @@ def faq_llm(state):
         ),
     ]
 
-    final_response = llm.invoke(messages)
+    try:
+        answer = await ainvoke_llm(messages, agent="faq_llm")
+    except LLMUnavailable:
+        answer = f"Here's what I found:\n\n{extractive_answer(tool_result)}"
 
     state["messages"].append(
-        AIMessage(content=final_response.content)
+        AIMessage(content=answer)
     )
 
     return state
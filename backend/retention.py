@@ -0,0 +1,280 @@
+# retention.py
+"""
+Retention for conversation_memory.
+
+- every session has a TTL (conversation_sessions.ttl_days, default
+  SESSION_TTL_DAYS) counted from its last activity
+- compact() moves expired sessions into per-day gzip JSONL archives
+  (archive/conversation_memory-YYYY-MM-DD.jsonl.gz) and deletes them
+  from the hot table in bounded batches (one short transaction each),
+  along with their summary, registry and session_state rows
+- RetentionJob runs compact() periodically in the background, in every
+  worker; a lease row (retention_lease) lets only one compact() run at
+  a time, so archive files never get interleaved or duplicate writes
+
+Rows are appended to the archive BEFORE their batch is deleted, so a
+crash can at worst archive a batch twice, never lose it. Every delete
+re-checks the session's expiry in the same write transaction, so a
+session that gets a new turn mid-compaction keeps its fresh rows,
+summary and router slots.
+
+CLI:
+    python -m backend.retention                  # compact expired sessions
+    python -m backend.retention --older-than 7   # default TTL of 7 days
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import uuid
+import argparse
+import threading
+from collections import defaultdict
+
+from backend.db import db_connection
+from backend.memory import MEMORY_DB, PROJECT_ROOT, init_memory_db
+from backend.graph.checkpoint import get_checkpointer
+
+SESSION_TTL_DAYS = int(os.getenv("SESSION_TTL_DAYS", "30"))
+RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "6"))
+ARCHIVE_DIR = os.getenv("MEMORY_ARCHIVE_DIR", os.path.join(PROJECT_ROOT, "archive"))
+
+RETENTION_BATCH = 5000          # rows archived + deleted per transaction
+RETENTION_SESSION_BATCH = 500   # expired sessions fetched per query
+RETENTION_LEASE_SECONDS = float(os.getenv("RETENTION_LEASE_SECONDS", "900"))   # renewed per session
+
+EXPIRED_SQL = "last_active < datetime('now', '-' || COALESCE(ttl_days, ?) || ' days')"
+
+
+# -----------------------------
+# Session registry
+# -----------------------------
+def register_session(session_id: str, user_id: str, ttl_days: int = None, db_path: str = MEMORY_DB):
+    with db_connection(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO conversation_sessions (session_id, user_id, ttl_days)
+            VALUES (?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                user_id = COALESCE(conversation_sessions.user_id, excluded.user_id),
+                ttl_days = COALESCE(conversation_sessions.ttl_days, excluded.ttl_days)
+            """,
+            (session_id, user_id, ttl_days)
+        )
+
+
+def expired_sessions(default_ttl_days: int, limit: int, db_path: str = MEMORY_DB):
+    with db_connection(db_path) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT session_id FROM conversation_sessions
+            WHERE {EXPIRED_SQL}
+            LIMIT ?
+            """,
+            (default_ttl_days, limit)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _still_expired(conn, session_id: str, default_ttl_days: int) -> bool:
+    return conn.execute(
+        f"SELECT 1 FROM conversation_sessions WHERE session_id = ? AND {EXPIRED_SQL}",
+        (session_id, default_ttl_days)
+    ).fetchone() is not None
+
+
+# -----------------------------
+# Cross-process lease
+# -----------------------------
+def acquire_lease(owner: str, seconds: float = RETENTION_LEASE_SECONDS, db_path: str = MEMORY_DB) -> bool:
+    """
+    Take (or renew) the compaction lease. False if another live owner holds it.
+    """
+    now = time.time()
+    with db_connection(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT owner, expires_at FROM retention_lease WHERE name = 'compact'"
+        ).fetchone()
+        if row and row[0] != owner and row[1] > now:
+            return False
+        conn.execute(
+            """
+            INSERT INTO retention_lease (name, owner, expires_at) VALUES ('compact', ?, ?)
+            ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            """,
+            (owner, now + seconds)
+        )
+    return True
+
+
+def release_lease(owner: str, db_path: str = MEMORY_DB):
+    with db_connection(db_path) as conn:
+        conn.execute("DELETE FROM retention_lease WHERE name = 'compact' AND owner = ?", (owner,))
+
+
+# -----------------------------
+# Archive
+# -----------------------------
+def archive_path(day: str, archive_dir: str = ARCHIVE_DIR) -> str:
+    return os.path.join(archive_dir, f"conversation_memory-{day}.jsonl.gz")
+
+
+def append_to_archive(rows, archive_dir: str = ARCHIVE_DIR):
+    """
+    rows: (id, session_id, role, content, timestamp). Grouped by the day
+    of `timestamp`; each call appends one gzip member per file.
+    """
+    by_day = defaultdict(list)
+    for row_id, session_id, role, content, timestamp in rows:
+        by_day[str(timestamp)[:10]].append(
+            json.dumps({
+                "id": row_id,
+                "session_id": session_id,
+                "role": role,
+                "content": content,
+                "timestamp": timestamp,
+            })
+        )
+
+    os.makedirs(archive_dir, exist_ok=True)
+    for day, lines in by_day.items():
+        with gzip.open(archive_path(day, archive_dir), "at", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+# -----------------------------
+# Compaction
+# -----------------------------
+def compact_session(session_id: str, default_ttl_days: int = SESSION_TTL_DAYS,
+                    batch_size: int = RETENTION_BATCH, archive_dir: str = ARCHIVE_DIR,
+                    db_path: str = MEMORY_DB) -> int:
+    """
+    Archive + delete one session (call with the lease held). Stops,
+    keeping the rest, as soon as the session is active again.
+    """
+    moved = 0
+    last_id = 0
+
+    while True:
+        with db_connection(db_path) as conn:
+            if not _still_expired(conn, session_id, default_ttl_days):
+                return moved
+            rows = conn.execute(
+                """
+                SELECT id, session_id, role, content, timestamp
+                FROM conversation_memory
+                WHERE session_id = ? AND id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (session_id, last_id, batch_size)
+            ).fetchall()
+
+        if not rows:
+            break
+
+        append_to_archive(rows, archive_dir)
+
+        with db_connection(db_path) as conn:
+            # the writer lock makes check + delete atomic against new turns
+            conn.execute("BEGIN IMMEDIATE")
+            if not _still_expired(conn, session_id, default_ttl_days):
+                return moved
+            conn.execute(
+                "DELETE FROM conversation_memory WHERE session_id = ? AND id > ? AND id <= ?",
+                (session_id, last_id, rows[-1][0])
+            )
+
+        moved += len(rows)
+        last_id = rows[-1][0]
+
+    with db_connection(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if not _still_expired(conn, session_id, default_ttl_days):
+            return moved
+        conn.execute("DELETE FROM conversation_summaries WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM conversation_sessions WHERE session_id = ?", (session_id,))
+
+    # router slots (active_order_id, pending_intent, ...) go with it
+    get_checkpointer().delete(session_id)
+
+    return moved
+
+
+def compact(default_ttl_days: int = SESSION_TTL_DAYS, batch_size: int = RETENTION_BATCH,
+            archive_dir: str = ARCHIVE_DIR, db_path: str = MEMORY_DB):
+    """
+    Archive + delete every expired session. Returns (sessions, rows);
+    (0, 0) if another process holds the lease.
+    """
+    owner = uuid.uuid4().hex
+    if not acquire_lease(owner, db_path=db_path):
+        return 0, 0
+
+    sessions = rows = 0
+    try:
+        while True:
+            expired = expired_sessions(default_ttl_days, RETENTION_SESSION_BATCH, db_path)
+            if not expired:
+                break
+            for session_id in expired:
+                if not acquire_lease(owner, db_path=db_path):   # renew; lost if we overran it
+                    return sessions, rows
+                rows += compact_session(session_id, default_ttl_days, batch_size, archive_dir, db_path)
+                sessions += 1
+    finally:
+        release_lease(owner, db_path)
+
+    return sessions, rows
+
+
+# -----------------------------
+# Background job
+# -----------------------------
+class RetentionJob:
+    """
+    Runs compact() every RETENTION_INTERVAL_HOURS on a daemon thread.
+    """
+
+    def __init__(self, interval_hours: float = RETENTION_INTERVAL_HOURS):
+        self.interval = interval_hours * 3600
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="memory-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                sessions, rows = compact()
+                if sessions:
+                    print(f"🗄️ Archived {rows} rows from {sessions} expired sessions")
+            except Exception as exc:
+                print(f"⚠️ memory retention failed: {exc}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive expired conversation memory")
+    parser.add_argument("--older-than", type=int, default=SESSION_TTL_DAYS,
+                        help="TTL in days for sessions without their own ttl_days")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--db", default=MEMORY_DB)
+    args = parser.parse_args(argv)
+
+    init_memory_db(args.db)
+    sessions, rows = compact(args.older_than, archive_dir=args.archive_dir, db_path=args.db)
+    print(f"✅ Archived {rows} rows from {sessions} expired sessions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+from backend.db import db_connection
+
+# ----------------------------------
+# Two-tier key -> value cache
+# ----------------------------------
+# Shared by the intent cache and the LLM response cache.
+# - memory tier: LRU with optional TTL; hits never leave the event loop
+# - disk tier (optional): SQLite file through db_connection() (pooled,
+#   WAL); survives restarts and is shared by workers on the same host
+# - _lock only guards the in-process LRU + counters, never disk I/O
+# - expired disk rows are purged at most every CACHE_PURGE_INTERVAL
+CACHE_PURGE_INTERVAL = float(os.getenv("CACHE_PURGE_INTERVAL", "300"))   # seconds
+
+
+class TieredCache:
+    """
+    Entries are (expires_at | None, value: str, tokens: int).
+    """
+
+    def __init__(self, table: str, max_size: int, ttl_seconds: float = None, disk_path: str = ""):
+        if not table.isidentifier():
+            raise ValueError(f"invalid cache table name: {table!r}")
+        self.table = table
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.disk_path = disk_path or None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_path:
+            with db_connection(self.disk_path) as conn:
+                conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    tokens INTEGER DEFAULT 0,
+                    expires_at REAL
+                )
+                """)
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_expires ON {table} (expires_at)")
+
+    def _new_entry(self, value: str, tokens: int):
+        return (time.time() + self.ttl if self.ttl else None, value, tokens)
+
+    # -----------------------------
+    # Memory tier
+    # -----------------------------
+    def _get_memory(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _put_memory(self, key: str, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    # -----------------------------
+    # Disk tier (no lock held)
+    # -----------------------------
+    def _get_disk(self, key: str):
+        with db_connection(self.disk_path) as conn:
+            row = conn.execute(
+                f"SELECT expires_at, value, tokens FROM {self.table} "
+                "WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (key, time.time())
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def _put_disk(self, key: str, entry):
+        now = time.time()
+        with self._lock:
+            purge = now >= self._next_purge
+            if purge:
+                self._next_purge = now + CACHE_PURGE_INTERVAL
+
+        with db_connection(self.disk_path) as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, tokens, expires_at) VALUES (?, ?, ?, ?)",
+                (key, entry[1], entry[2], entry[0])
+            )
+            if purge:
+                conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def lookup(self, key: str):
+        entry = self._get_memory(key)
+        if entry is not None:
+            return entry
+
+        entry = self._get_disk(key) if self.disk_path else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+        if entry is not None:
+            self._put_memory(key, entry)
+        return entry
+
+    def store(self, key: str, value: str, tokens: int = 0):
+        entry = self._new_entry(value, tokens)
+        self._put_memory(key, entry)
+        if self.disk_path:
+            self._put_disk(key, entry)
+
+    async def alookup(self, key: str):
+        # memory hits never leave the event loop
+        entry = self._get_memory(key)
+        if entry is not None:
+            return entry
+        if not self.disk_path:
+            with self._lock:
+                self.misses += 1
+            return None
+        return await asyncio.to_thread(self.lookup, key)
+
+    async def astore(self, key: str, value: str, tokens: int = 0):
+        if self.disk_path:
+            await asyncio.to_thread(self.store, key, value, tokens)
+        else:
+            self._put_memory(key, self._new_entry(value, tokens))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,91 @@
+"""
+catalog_bench.py
+
+Bulk-load + resolve benchmark for the product catalog (backend/catalog.py).
+
+Generates a synthetic catalog (brand x item x variant), loads it into a
+scratch DB through load_products() and times resolve_product() for
+order_agent-style product texts, reporting:
+
+- load throughput (rows/s, incl. the FTS index rebuild)
+- p50 / p99 resolve latency and, per query, the match or the number
+  of candidates the user would be asked to choose from
+
+Usage:
+    python -m benchmarks.catalog_bench
+    python -m benchmarks.catalog_bench --rows 500000 --repeat 200
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from backend.db import init_db
+from backend.catalog import load_products, resolve_product
+
+BRANDS = ["Sony", "boAt", "Samsung", "Apple", "Milton", "Dell", "HP", "Nike",
+          "Puma", "Philips", "Prestige", "JBL", "Lenovo", "Asus", "Bajaj"]
+ITEMS = ["wireless headphones", "water bottle", "laptop stand", "running shoes", "phone case",
+         "smartwatch", "mirror", "air fryer", "yoga mat", "bluetooth speaker", "gaming mouse",
+         "usb-c cable", "coffee mug", "study table", "kettle", "school bag", "monitor",
+         "notebook", "blender", "desk lamp"]
+VARIANTS = ["", "Pro", "Max", "Lite", "Plus", "Mini", "2", "3", "X", "Neo"]
+
+QUERIES = [
+    "wireless headphones", "headphone", "Milton water bottle", "laptop stand",
+    "running shoes", "phone case", "apple smartwatch", "air fryer", "kettle",
+    "Sony bluetooth speaker", "gaming mouse", "usb-c cable", "milton water bottel",
+    "Sony wireless headphones pro", "teleporter",
+]
+
+
+def synthetic_rows(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} {rng.choice(VARIANTS)}".strip()
+        yield (f"SKU-{i:07d}", f"{name} {i % 997}", "general", round(rng.uniform(5, 500), 2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="product catalog load / resolve benchmark")
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--repeat", type=int, default=100, help="timed resolves per query")
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="catalog_bench_"), "orders.db")
+    init_db(db_path)
+
+    started = time.perf_counter()
+    loaded = load_products(synthetic_rows(args.rows), db_path=db_path)
+    elapsed = time.perf_counter() - started
+    print(f"Loaded            : {loaded} SKUs in {elapsed:.1f} s = {loaded / elapsed:,.0f} rows/s\n")
+
+    resolve_product("warm up", db_path)
+    latencies = []
+    print(f"{'query':<32}{'p50 ms':>9}  match")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            result = resolve_product(query, db_path)
+            timings.append((time.perf_counter() - t0) * 1e3)
+        latencies.extend(timings)
+        if result["match"]:
+            outcome = result["match"]["name"]
+        elif result["candidates"]:
+            outcome = f"ask: {len(result['candidates'])} candidates, top {result['candidates'][0]['name']!r}"
+        else:
+            outcome = "-"
+        print(f"{query:<32}{statistics.median(timings):>9.3f}  {outcome}")
+
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"\nResolve latency   : p50 {statistics.median(latencies):.3f} ms, p99 {p99:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+delivery_eta_bench.py
+
+Delivery-window benchmark for "Track all my orders" (track_agent).
+
+Computes the 5–7 business-day window for N synthetic order dates two
+ways and reports the time per call:
+
+- loop      : the old per-order add_business_days() day-by-day loop
+- vectorized: delivery_windows(), one numpy.busday_offset per bound
+
+and checks both agree (with DELIVERY_HOLIDAYS unset).
+
+Usage:
+    python -m benchmarks.delivery_eta_bench
+    python -m benchmarks.delivery_eta_bench --orders 5000 --repeat 50
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+os.environ["DELIVERY_HOLIDAYS"] = ""
+
+from backend.agents.track_agent import DELIVERY_MAX_DAYS, DELIVERY_MIN_DAYS, delivery_windows
+
+
+def loop_add_business_days(start_date: datetime, days: int) -> datetime:
+    current_date = start_date
+    added_days = 0
+    while added_days < days:
+        current_date += timedelta(days=1)
+        if current_date.weekday() < 5:
+            added_days += 1
+    return current_date
+
+
+def synthetic_order_dates(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    return [
+        (base + timedelta(days=rng.randrange(700), seconds=rng.randrange(86400))).isoformat(" ")
+        for _ in range(count)
+    ]
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="delivery window loop vs numpy benchmark")
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    order_dates = synthetic_order_dates(args.orders)
+
+    def loop():
+        return [
+            (loop_add_business_days(datetime.fromisoformat(d), DELIVERY_MIN_DAYS).date(),
+             loop_add_business_days(datetime.fromisoformat(d), DELIVERY_MAX_DAYS).date())
+            for d in order_dates
+        ]
+
+    def vectorized():
+        starts, ends = delivery_windows(order_dates)
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    if loop() != vectorized():
+        print("❌ loop and vectorized windows disagree")
+        return 1
+
+    loop_ms = timed(loop, args.repeat)
+    vectorized_ms = timed(vectorized, args.repeat)
+    print(f"Orders            : {args.orders}")
+    print(f"Loop              : {loop_ms:.2f} ms")
+    print(f"Vectorized        : {vectorized_ms:.2f} ms ({loop_ms / vectorized_ms:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
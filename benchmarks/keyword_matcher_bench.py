@@ -0,0 +1,102 @@
+"""
+keyword_matcher_bench.py
+
+Micro-benchmark: the router's keyword classification, old vs new.
+
+- legacy : one `any(p in lowered for p in ...)` substring scan per list
+           (what intent_router did before the compiled matcher)
+- matcher: the routing rules' KeywordMatcher, one pass for all lists
+
+Also prints how many messages the two disagree on (word boundaries).
+
+Usage:
+    python -m benchmarks.keyword_matcher_bench
+    python -m benchmarks.keyword_matcher_bench --messages 1000000
+"""
+import argparse
+import random
+import sys
+import time
+
+from backend.graph.routing_rules import RoutingRules
+
+SEED_MESSAGES = [
+    "Place an order for headphones",
+    "Order 2 wireless headphones",
+    "Track my order ORD-20eb75",
+    "Where is my order?",
+    "Check status of ORD-9876",
+    "Return ORD-37682e because it is damaged",
+    "I want to know if it's possible to send back something I ordered",
+    "I want to raise a ticket for ORD-60022a as it is not of good quality as expected",
+    "What is your return policy?",
+    "How does refund work?",
+    "Talk to a human",
+    "This is frustrating",
+    "I have an issue with the management of my account",
+    "Tell me a joke",
+    "What is the weather?",
+    "please give me the current status of my order ORD-4f55cb",
+    "The product is faulty, what can be done?",
+    "this is urgent, I need help now",
+]
+
+FILLER = "hello please thanks kindly today my the a for with about from".split()
+
+RULES = RoutingRules.load()
+
+LEGACY_LISTS = [
+    (rule["name"], [k.lower() for k in rule["keywords"]]) for rule in RULES.rules
+]
+
+
+def legacy_matches(text: str):
+    lowered = text.lower()
+    return {name for name, words in LEGACY_LISTS if any(w in lowered for w in words)}
+
+
+def build_corpus(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = rng.choice(SEED_MESSAGES).split()
+        for _ in range(rng.randint(0, 12)):
+            words.insert(rng.randint(0, len(words)), rng.choice(FILLER))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def bench(fn, corpus):
+    started = time.perf_counter()
+    results = [fn(text) for text in corpus]
+    return time.perf_counter() - started, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Router keyword matcher benchmark")
+    parser.add_argument("--messages", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.messages)
+
+    legacy_s, legacy = bench(legacy_matches, corpus)
+    matcher_s, compiled = bench(RULES.matcher.matches, corpus)
+
+    print(f"messages          : {len(corpus):,}")
+    print(f"legacy substring  : {legacy_s:.3f}s  ({legacy_s / len(corpus) * 1e6:.2f} µs/msg)")
+    print(f"compiled matcher  : {matcher_s:.3f}s  ({matcher_s / len(corpus) * 1e6:.2f} µs/msg)")
+    print(f"speedup           : {legacy_s / matcher_s:.2f}x")
+
+    disagreements = {}
+    for text, old, new in zip(corpus, legacy, compiled):
+        if old != new:
+            disagreements.setdefault(text, (old, new))
+    print(f"disagreements     : {len(disagreements):,} distinct messages")
+    for text, (old, new) in list(disagreements.items())[:5]:
+        print(f"  {text!r}\n    legacy={sorted(old)} matcher={sorted(new)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+memory_bench.py
+
+Conversation memory benchmark: load_memory() latency as
+conversation_memory grows.
+
+Rows are bulk-inserted with executemany across many sessions; after each
+checkpoint the script times load_memory() for random sessions. With the
+(session_id, id) index the p50/p99 should stay flat from 10^5 to 10^7+
+rows.
+
+Usage:
+    python -m benchmarks.memory_bench
+    python -m benchmarks.memory_bench --rows 20000000 --sessions 2000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from backend.db import db_connection
+from backend.memory import INSERT_MEMORY_SQL, init_memory_db, load_memory
+
+
+def grow(db_path: str, start: int, end: int, sessions: int, batch: int = 100_000):
+    for lo in range(start, end, batch):
+        hi = min(lo + batch, end)
+        with db_connection(db_path) as conn:
+            conn.executemany(
+                INSERT_MEMORY_SQL,
+                (
+                    (f"sess_{i % sessions:08x}", "human" if i % 2 else "ai", f"message {i}")
+                    for i in range(lo, hi)
+                ),
+            )
+
+
+def time_loads(db_path: str, sessions: int, samples: int = 2000):
+    timings = []
+    for _ in range(samples):
+        session_id = f"sess_{random.randrange(sessions):08x}"
+        started = time.perf_counter()
+        load_memory(session_id, db_path=db_path)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="load_memory latency vs table size")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    checkpoints = []
+    size = 100_000
+    while size < args.rows:
+        checkpoints.append(size)
+        size *= 10
+    checkpoints.append(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory_bench.db")
+        init_memory_db(db_path)
+
+        print(f"{'rows':>12} {'p50 µs':>10} {'p99 µs':>10}")
+        inserted = 0
+        for target in checkpoints:
+            grow(db_path, inserted, target, args.sessions)
+            inserted = target
+            p50, p99 = time_loads(db_path, args.sessions)
+            print(f"{inserted:>12,} {p50:>10.1f} {p99:>10.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+offline_bench.py
+
+Throughput benchmark for the chat turn in offline ("no-LLM") mode.
+
+Every message of the labeled corpus (benchmarks/router_corpus.jsonl)
+runs through intent_router and then the agent node it routes to, the
+same sequence the graph executes, against a scratch orders DB seeded
+with the corpus' order IDs. LLM_OFFLINE=1 makes every LLM touch point
+use its deterministic implementation (backend/offline.py); the run
+fails if any turn still makes an LLM call.
+
+Reports turns/s and p50 / p99 latency per node. faq_agent turns are
+only routed unless --faq is given (retrieval needs the vector store).
+
+Usage:
+    python -m benchmarks.offline_bench
+    python -m benchmarks.offline_bench --repeat 200 --faq
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from collections import defaultdict
+
+_scratch = tempfile.mkdtemp(prefix="offline_bench_")
+os.environ["LLM_OFFLINE"] = "1"
+os.environ["ORDERS_DB_PATH"] = os.path.join(_scratch, "orders.db")
+os.environ.setdefault("MEMORY_DB_PATH", os.path.join(_scratch, "memory.db"))
+os.environ.setdefault("INTENT_CLASSIFIER_ENABLED", "0")   # no embedding model download
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")   # never called
+
+from langchain_core.messages import HumanMessage
+
+from backend.db import DB_NAME, db_connection, init_db
+from backend.memory import init_memory_db
+from backend.llm_ledger import start_llm_ledger
+from backend.graph.routher import intent_router
+from backend.agents.order_agent import order_agent
+from backend.agents.track_agent import track_agent
+from backend.agents.ticket_agent import ticket_agent
+from backend.agents.return_agent import return_agent
+from benchmarks.router_bench import CORPUS_PATH, load_corpus
+
+USER_ID = "bench_user"
+
+AGENTS = {
+    "order_agent": order_agent,
+    "track_agent": track_agent,
+    "ticket_agent": ticket_agent,
+    "return_agent": return_agent,
+}
+
+
+def seed_orders(corpus):
+    order_ids = {
+        order_id
+        for example in corpus
+        for order_id in re.findall(r"ORD-[A-Za-z0-9]+", example["text"])
+    }
+    with db_connection(DB_NAME) as conn:
+        conn.executemany(
+            "INSERT INTO orders (order_id, user_id, product_name, quantity, status) VALUES (?, ?, ?, ?, ?)",
+            [(order_id, USER_ID, "Benchmark item", 1, "PLACED") for order_id in order_ids]
+        )
+    return len(order_ids)
+
+
+async def run(corpus, repeat: int, with_faq: bool):
+    if with_faq:
+        from backend.rag.faq_agent import faq_llm
+        AGENTS["faq_agent"] = faq_llm
+
+    latencies = defaultdict(list)
+    turns = llm_calls = 0
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        for example in corpus:
+            ledger = start_llm_ledger()
+            state = {
+                "messages": [HumanMessage(content=example["text"])],
+                "intent": "",
+                "user_id": USER_ID,
+                "session_id": "bench_session",
+            }
+
+            t0 = time.perf_counter()
+            state = await intent_router(state)
+            t1 = time.perf_counter()
+            latencies["intent_router"].append((t1 - t0) * 1e3)
+
+            node = AGENTS.get(state.get("next_node"))
+            if node is not None:
+                state = await node(state)
+                latencies[state["next_node"]].append((time.perf_counter() - t1) * 1e3)
+
+            latencies["turn"].append((time.perf_counter() - t0) * 1e3)
+            llm_calls += ledger.totals()["calls"]
+            turns += 1
+
+    return turns, time.perf_counter() - started, latencies, llm_calls
+
+
+def print_report(turns, elapsed, latencies, llm_calls):
+    print(f"Turns             : {turns} in {elapsed:.2f} s = {turns / elapsed:,.0f} turns/s")
+    print(f"LLM calls         : {llm_calls}\n")
+
+    print(f"{'node':<16}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        p99 = values[max(0, int(len(values) * 0.99) - 1)]
+        print(f"{name:<16}{len(values):>8}{statistics.median(values):>10.3f}{p99:>10.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="offline (no-LLM) chat turn throughput")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--repeat", type=int, default=50, help="passes over the corpus")
+    parser.add_argument("--faq", action="store_true", help="also run faq_llm (needs the vector store)")
+    args = parser.parse_args(argv)
+
+    init_db(DB_NAME)
+    init_memory_db()
+    corpus = load_corpus(args.corpus)
+    print(f"Seeded {seed_orders(corpus)} orders into {DB_NAME}\n")
+
+    turns, elapsed, latencies, llm_calls = asyncio.run(run(corpus, args.repeat, args.faq))
+    print_report(turns, elapsed, latencies, llm_calls)
+
+    if llm_calls:
+        print("\n⚠️ offline mode still made LLM calls")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+order_parser_bench.py
+
+Coverage / accuracy / latency benchmark for order_agent's local parser.
+
+Runs a labeled corpus of order messages (benchmarks/order_corpus.jsonl,
+seeded from Supported_Queries.md) through parse_order_items() and
+reports:
+
+- fast-path coverage: messages answered without any LLM call
+- accuracy of those answers (every line item's product, case-insensitive,
+  and quantity)
+- negative cases (product null: "order now", "get me a refund", "order
+  two", "order 5 pcs", zero / huge quantities) must yield no order, or
+  go to the LLM
+- messages left for the LLM, and fast-path answers that disagree
+- p50 / p99 parse latency
+
+Usage:
+    python -m benchmarks.order_parser_bench
+    python -m benchmarks.order_parser_bench --corpus my_orders.jsonl --repeat 1000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+from backend.agents.order_parser import parse_order_items
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "order_corpus.jsonl")
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def expected_items(example: dict):
+    """
+    Labels are either {"items": [...]} or a single "product" / "quantity"
+    (product null = an order with no product -> []).
+    """
+    if "items" in example:
+        return example["items"]
+    return [{"product": example["product"], "quantity": example["quantity"]}] if example["product"] else []
+
+
+def is_correct(parsed: list, example: dict) -> bool:
+    expected = expected_items(example)
+    return len(parsed) == len(expected) and all(
+        got["product"].lower() == want["product"].lower() and got["quantity"] == want["quantity"]
+        for got, want in zip(parsed, expected)
+    )
+
+
+def run(corpus, repeat: int):
+    handled, wrong, to_llm = [], [], []
+    latencies = []
+
+    for example in corpus:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parsed = parse_order_items(example["text"])
+            latencies.append((time.perf_counter() - started) * 1e6)
+
+        if parsed is None:
+            to_llm.append(example)
+        elif is_correct(parsed, example):
+            handled.append(example)
+        else:
+            wrong.append((example, parsed))
+
+    return handled, wrong, to_llm, latencies
+
+
+def print_report(corpus, handled, wrong, to_llm, latencies):
+    fast = len(handled) + len(wrong)
+    print(f"Fast path         : {fast}/{len(corpus)} = {fast / len(corpus):.1%} never reach the LLM")
+    if fast:
+        print(f"Fast-path accuracy: {len(handled)}/{fast} = {len(handled) / fast:.1%}")
+
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"Parse latency     : p50 {statistics.median(latencies):.1f} µs, p99 {p99:.1f} µs")
+
+    if wrong:
+        print("\nFast path disagrees with label")
+        for example, parsed in wrong:
+            print(f"  {example['text']!r}: {parsed} (expected {expected_items(example)})")
+
+    print("\nLeft for the LLM")
+    for example in to_llm:
+        print(f"  {example['text']!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="order_agent local parser benchmark")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--repeat", type=int, default=200, help="timed parses per message")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    print_report(corpus, *run(corpus, args.repeat))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+query_plans.py
+
+Query-plan regression check for the orders / tickets / returns schema.
+
+- builds a fresh DB with init_db()
+- runs EXPLAIN QUERY PLAN on every entry of HOT_QUERIES
+- exits 1 if any hot query falls back to a table scan
+
+Optional: --rows N seeds N orders (plus tickets/returns) and times each
+hot query, to see the indexes hold up at production size.
+
+Usage:
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --rows 2000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from backend.db import HOT_QUERIES, explain_query_plan, find_table_scans, get_connection, init_db
+
+
+def seed(conn, rows: int, users: int = 50_000, batch: int = 50_000):
+    for start in range(0, rows, batch):
+        end = min(start + batch, rows)
+        conn.executemany(
+            "INSERT INTO orders (order_id, user_id, product_name, quantity, status) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (f"ORD-{i:08X}", f"user_{i % users}", "wireless headphones", 1, "PLACED")
+                for i in range(start, end)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO support_tickets (ticket_num, user_id, order_id, issue, status) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (f"TCK-{i:08X}", f"user_{i % users}", f"ORD-{i:08X}", "damaged", "OPEN")
+                for i in range(start, end, 10)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO returns (user_id, order_id, reason, status) VALUES (?, ?, ?, ?)",
+            (
+                (f"user_{i % users}", f"ORD-{i:08X}", "damaged", "RETURN_REQUESTED")
+                for i in range(start, end, 10)
+            ),
+        )
+        conn.commit()
+    conn.execute("ANALYZE")
+
+
+def time_queries(conn, repeat: int = 1000):
+    for name, (sql, params) in HOT_QUERIES.items():
+        if sql.lstrip().upper().startswith("UPDATE"):
+            continue
+        started = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        elapsed_us = (time.perf_counter() - started) / repeat * 1e6
+        print(f"  {name:<22} {elapsed_us:9.1f} µs/query")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=0, help="orders to seed before timing")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "plans.db")
+        init_db(db_path)
+        conn = get_connection(db_path)
+
+        if args.rows:
+            print(f"Seeding {args.rows:,} orders ...")
+            seed(conn, args.rows)
+
+        for name, (sql, params) in HOT_QUERIES.items():
+            print(f"{name}:")
+            for detail in explain_query_plan(conn, sql, params):
+                print(f"    {detail}")
+
+        if args.rows:
+            print("\nLatency:")
+            time_queries(conn)
+
+        scans = find_table_scans(conn)
+        conn.close()
+
+    if scans:
+        print("\n❌ Table scans on hot queries: " + ", ".join(sorted(scans)))
+        return 1
+
+    print("\n✅ All hot queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+router_bench.py
+
+Offline accuracy + latency benchmark for intent_router.
+
+Runs a labeled corpus (benchmarks/router_corpus.jsonl, seeded from
+Supported_Queries.md and "User Queries For Demo.txt") through the real
+router with the LLM fallback stubbed out, and reports:
+
+- confusion matrix (expected vs routed)
+- per-rule hit counts (routing_rules.json)
+- fraction of messages that reach the LLM fallback
+- p50 / p99 routing latency
+
+A message the router answers itself while waiting for an order ID
+counts as routed to the pending intent (e.g. "Where is my order?").
+Order-ID prefetches are answered in memory (every corpus ID exists),
+so the timings are routing only and the tracked orders.db is never
+opened.
+
+Usage:
+    python -m benchmarks.router_bench
+    python -m benchmarks.router_bench --oracle       # stub answers correctly
+    python -m benchmarks.router_bench --corpus my_labeled.jsonl --repeat 50
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from collections import Counter, defaultdict
+
+_scratch = tempfile.mkdtemp(prefix="router_bench_")
+os.environ["ORDERS_DB_PATH"] = os.path.join(_scratch, "orders.db")
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")   # never called
+
+from langchain_core.messages import HumanMessage
+
+from backend.graph import routher
+from backend.graph.routing_rules import get_routing_rules
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_corpus.jsonl")
+
+NODE_TO_LABEL = {
+    "order_agent": "place_order",
+    "track_agent": "track_order",
+    "return_agent": "return_order",
+    "ticket_agent": "raise_ticket",
+    "faq_agent": "faq_llm",
+}
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class StubLLM:
+    """
+    Replaces routher.llm_intent_classify; counts fallbacks.
+    """
+
+    def __init__(self, oracle: bool):
+        self.oracle = oracle
+        self.calls = 0
+        self.expected = None
+
+    async def __call__(self, text: str) -> str:
+        self.calls += 1
+        if self.oracle and self.expected in NODE_TO_LABEL:
+            return NODE_TO_LABEL[self.expected]
+        return "faq_llm"
+
+
+def stub_order_lookup(order_id: str, user_id: str):
+    """
+    Replaces routher.start_order_lookup: an already-finished lookup
+    that finds the order.
+    """
+    lookup = asyncio.get_running_loop().create_future()
+    lookup.set_result({"order_id": order_id, "user_id": user_id, "status": "PLACED"})
+    return lookup
+
+
+def routed_label(state) -> str:
+    node = state.get("next_node", "END")
+    if node == "END" and state.get("pending_intent"):
+        return state["pending_intent"]
+    return node
+
+
+async def run(corpus, repeat: int, oracle: bool):
+    stub = StubLLM(oracle)
+    routher.llm_intent_classify = stub
+    routher.start_order_lookup = stub_order_lookup
+
+    rules = get_routing_rules()
+    confusion = defaultdict(Counter)
+    rule_hits = Counter()
+    fallback_messages = 0
+    latencies = []
+
+    for example in corpus:
+        escalation_rule, intent_rule = rules.classify(example["text"])
+        rule_hits[(escalation_rule or intent_rule or {"name": "<none>"})["name"]] += 1
+
+        stub.expected = example["expected"]
+        calls_before = stub.calls
+
+        for i in range(repeat):
+            state = {
+                "messages": [HumanMessage(content=example["text"])],
+                "intent": "",
+                "user_id": "bench_user",
+                "session_id": "bench_session",
+            }
+            started = time.perf_counter()
+            state = await routher.intent_router(state)
+            latencies.append((time.perf_counter() - started) * 1e6)
+
+            if i == 0:
+                confusion[example["expected"]][routed_label(state)] += 1
+
+        if stub.calls > calls_before:
+            fallback_messages += 1
+
+    return confusion, rule_hits, fallback_messages, latencies
+
+
+def print_report(corpus, confusion, rule_hits, fallback_messages, latencies):
+    labels = sorted({*confusion, *(p for row in confusion.values() for p in row)})
+    width = max(len(label) for label in labels) + 2
+
+    print("Confusion matrix (rows = expected, cols = routed)\n")
+    print(" " * width + "".join(f"{label[:10]:>12}" for label in labels))
+    for expected in labels:
+        row = confusion.get(expected, Counter())
+        print(f"{expected:<{width}}" + "".join(f"{row[p]:>12}" for p in labels))
+
+    correct = sum(confusion[label][label] for label in confusion)
+    print(f"\nAccuracy          : {correct}/{len(corpus)} = {correct / len(corpus):.1%}")
+    print(f"LLM fallback      : {fallback_messages}/{len(corpus)} = {fallback_messages / len(corpus):.1%}")
+
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"Routing latency   : p50 {statistics.median(latencies):.1f} µs, p99 {p99:.1f} µs")
+
+    print("\nRule hits")
+    for name, count in rule_hits.most_common():
+        print(f"  {name:<12} {count}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="intent_router accuracy / latency benchmark")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per message")
+    parser.add_argument("--oracle", action="store_true",
+                        help="stubbed LLM returns the expected label (rule-path ceiling)")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    results = asyncio.run(run(corpus, args.repeat, args.oracle))
+    print_report(corpus, *results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())